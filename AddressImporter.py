@@ -1,68 +1,241 @@
-import csv, re
+import csv, re, os, sys, json, mmap, hashlib
+from array import array
+from multiprocessing import shared_memory
 
 class AddressImporter:
     """
     A class for importing address data and distances from a CSV file.
     """
-    def __init__(self, file):
+    # Street address of the delivery HUB
+    HUB_ADDRESS = "4001 South 700 East"
+    # Version of the on-disk cache layout, bump when the format changes
+    CACHE_VERSION = 2
+
+    def __init__(self, file, cache=True, shared=None):
         """
         Initialize the AddressImporter with the given CSV file and process its contents.
 
         Args:
             file: Path to the CSV file containing address and distance data.
+            cache: Load from (and maintain) a binary cache next to the CSV file. Defaults to True.
+            shared: State returned by another AddressImporter's share(), to attach to its
+                shared memory instead of loading the file. Defaults to None.
         """
         self.file = file
+        self.cache = cache
+        self.cache_file = f"{file}.cache" # Packed binary distance matrix
+        self.cache_meta_file = f"{file}.cache.json" # Address index sidecar and cache key
         self.count = 0  # Counter for the number of addresses
         self.addr_names = [] # List to store address names/titles
         self.addresses = [] # List to store formatted addresses
-        self.distances = [] # 2D list to store distances between addresses
-        self._import_addresses() # Import address data
-        self._import_distances() # Import distance data
+        self.address_index = {} # Dict mapping formatted addresses to their integer index
+        self.distances = array('d') # Packed lower triangle of the symmetric distance matrix, n(n+1)/2 entries
+        self._mmap = None # Memory map backing the distances when loaded from the cache
+        self._neighbors = {} # Address index -> every address index sorted by distance, built on first use
+        self._shared = None # Shared memory block holding the distances, if shared or attached
+        if shared is not None:
+            self._attach_shared(shared)
+        elif not (self.cache and self._load_cache()):
+            self._import_file() # Import address and distance data
+            if self.cache:
+                self._save_cache()
+        self.hub_index = self.getAddressIndex("HUB") # Index of the HUB address
     
-    def _import_addresses(self):
+    def _import_file(self):
         """
-        Private method to import address data from the CSV file.
+        Private method to import address and distance data from the CSV file in a single pass.
+
+        The CSV file holds the lower triangle of a symmetric distance table, row y listing
+        the distances to addresses 0..y. Each row is appended to the packed triangular
+        distance array as it is read, so the file is only opened once.
         """
         # Regex pattern to match the name/title of the address
         # Group 1: Name/title of the address
-        name_pattern = r"^[\s\S]*?(.*?)$"
-        # Group 1: Name/title of the address
+        name_pattern = re.compile(r"^[\s\S]*?(.*?)$", re.MULTILINE)
         # Group 1: Number
         # Group 2: Street
         # Group 3: Zipcode
-        addr_pattern = r"^\s*(\d+)\s+(.*)\s*\((\d{5})\)\s*$"
+        addr_pattern = re.compile(r"^\s*(\d+)\s+(.*)\s*\((\d{5})\)\s*$", re.MULTILINE)
 
         with open(self.file, 'r') as file:
             csv_reader = csv.reader(file)
             for row in csv_reader:
                 # Add address name to list
-                name_match = re.search(name_pattern, row[0], re.MULTILINE)
+                name_match = name_pattern.search(row[0])
                 self.addr_names.append(name_match.group(1))
-                # Add formatted address to list
-                addr_match = re.search(addr_pattern, row[1], re.MULTILINE)
-                self.addresses.append(f"{self._normalize_address(addr_match.group(1))} {self._normalize_address(addr_match.group(2))}")
+                # Add formatted address to list, and map it to its index
+                addr_match = addr_pattern.search(row[1])
+                address = f"{self._normalize_address(addr_match.group(1))} {self._normalize_address(addr_match.group(2))}"
+                self.addresses.append(address)
+                self.address_index[address] = self.count
+                # Append the distances to addresses 0..count, blank cells are treated as 0
+                row_dist = row[2:self.count + 3] # Slice row to get distance data
+                self.distances.extend(float(dist) if len(dist) > 0 else 0.0 for dist in row_dist)
+                self.distances.extend(0.0 for _ in range(self.count + 1 - len(row_dist)))
                 # Increment address counter
                 self.count += 1
     
-    def _import_distances(self):
+    def _source_key(self):
         """
-        Private method to import distance data from the CSV file.
+        Private method to get the cache key of the CSV file.
+
+        Returns:
+            A dict with the size, modification time and SHA-256 hash of the CSV file.
         """
-        # Initialize 2D list for distances with zeros
-        self.distances = [[0 for _ in range(self.count)] for __ in range(self.count)]
+        stat = os.stat(self.file)
+        return {"size": stat.st_size, "mtime": stat.st_mtime_ns, "sha256": self._source_hash()}
+
+    def _source_hash(self):
+        """
+        Private method to hash the contents of the CSV file.
+
+        Returns:
+            The hex SHA-256 digest of the CSV file.
+        """
+        digest = hashlib.sha256()
+        with open(self.file, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _load_cache(self):
+        """
+        Private method to load addresses and distances from the binary cache.
+
+        The cache is used when the CSV file's size and modification time match the sidecar,
+        or failing that when its content hash still matches (e.g. after a fresh checkout).
+        The distance matrix is memory-mapped rather than read, so it is shared between processes.
+
+        Returns:
+            True if the cache was valid and loaded, False if it must be rebuilt.
+        """
+        try:
+            with open(self.cache_meta_file, 'r') as file:
+                meta = json.load(file)
+            if (meta["version"] != self.CACHE_VERSION) or (meta["byteorder"] != sys.byteorder):
+                return False
+
+            stat = os.stat(self.file)
+            if (meta["source"]["size"] != stat.st_size) or (meta["source"]["mtime"] != stat.st_mtime_ns):
+                if (meta["source"]["size"] != stat.st_size) or (meta["source"]["sha256"] != self._source_hash()):
+                    return False
+                # Contents unchanged, refresh the stored modification time
+                meta["source"]["mtime"] = stat.st_mtime_ns
+                self._write_cache_meta(meta)
+
+            count = meta["count"]
+            with open(self.cache_file, 'rb') as file:
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            if len(mapped) != (count * (count + 1) // 2) * self.distances.itemsize:
+                mapped.close()
+                return False
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+        self._mmap = mapped
+        self.distances = memoryview(mapped).cast('d')
+        self.count = count
+        self.addr_names = meta["addr_names"]
+        self.addresses = meta["addresses"]
+        self.address_index = {address: index for index, address in enumerate(self.addresses)}
+        return True
+
+    def _save_cache(self):
+        """
+        Private method to write the parsed addresses and distances to the binary cache.
+
+        Files are written to a temporary path and renamed into place, so concurrent readers
+        never see a partial cache. Failures are ignored, the cache is only an optimization.
+        """
+        meta = {
+            "version": self.CACHE_VERSION,
+            "byteorder": sys.byteorder,
+            "source": self._source_key(),
+            "count": self.count,
+            "addr_names": self.addr_names,
+            "addresses": self.addresses,
+        }
+        try:
+            with open(f"{self.cache_file}.tmp", 'wb') as file:
+                self.distances.tofile(file)
+            os.replace(f"{self.cache_file}.tmp", self.cache_file)
+            self._write_cache_meta(meta)
+        except OSError:
+            pass
+
+    def _write_cache_meta(self, meta):
+        """
+        Private method to atomically write the cache sidecar.
+
+        Args:
+            meta: The sidecar contents.
+        """
+        with open(f"{self.cache_meta_file}.tmp", 'w') as file:
+            json.dump(meta, file)
+        os.replace(f"{self.cache_meta_file}.tmp", self.cache_meta_file)
+
+    def share(self):
+        """
+        Public method to copy the distance matrix into shared memory for other processes.
+
+        The block stays alive until unshare() is called.
+
+        Returns:
+            A picklable dict to pass to AddressImporter(file, shared=...) in another process.
+        """
+        if self._shared is None:
+            data = memoryview(self.distances).cast('B')
+            self._shared = shared_memory.SharedMemory(create=True, size=max(len(data), 1))
+            self._shared.buf[:len(data)] = data
+        return {
+            "name": self._shared.name,
+            "count": self.count,
+            "addr_names": self.addr_names,
+            "addresses": self.addresses,
+        }
+
+    def unshare(self):
+        """
+        Public method to release the shared memory block created by share().
+        """
+        if self._shared is not None:
+            self._shared.close()
+            self._shared.unlink()
+            self._shared = None
+
+    def _attach_shared(self, shared):
+        """
+        Private method to use another process's shared distance matrix.
+
+        Args:
+            shared: State returned by share().
+        """
+        self._shared = shared_memory.SharedMemory(name=shared["name"])
+        self.count = shared["count"]
+        self.addr_names = shared["addr_names"]
+        self.addresses = shared["addresses"]
+        self.address_index = {address: index for index, address in enumerate(self.addresses)}
+        # The block may be rounded up to a whole page, only view the matrix itself
+        self.distances = self._shared.buf.cast('d')[:self.count * (self.count + 1) // 2]
+
+    def getAddressIndex(self, addr):
+        """
+        Public method to resolve an address string to its integer index.
+
+        Args:
+            addr: The address to resolve, or "HUB".
+
+        Returns:
+            The index of the address in the distance matrix.
+
+        Raises:
+            KeyError: If the address is not in the address book.
+        """
+        # Handle HUB address
+        if addr == "HUB":
+            addr = self.HUB_ADDRESS
+        return self.address_index[self._normalize_address(addr)]
 
-        with open(self.file, 'r') as file:
-            csv_reader = csv.reader(file)
-            y = 0
-            for row in csv_reader:
-                row_dist = row[2:] # Slice row to get distance data
-                for x in range(self.count):
-                    # If distance value exists, add it to the distances 2D list
-                    if len(row_dist[x]) > 0:
-                        self.distances[y][x] = float(row_dist[x])
-                        self.distances[x][y] = float(row_dist[x]) # Mirror the distance value
-                y += 1
-    
     def distance(self, addr1, addr2):
         """
         Public method to get the distances between two addresses
@@ -70,18 +243,92 @@ class AddressImporter:
         Returns:
             The distance between two addresses
         """
-        # Handle HUB address
-        if addr1 == "HUB":
-            addr1 = "4001 South 700 East"
-        if addr2 == "HUB":
-            addr2 = "4001 South 700 East"
-        # Get distance between the two addresses
-        addr1 = self._normalize_address(addr1)
-        addr2 = self._normalize_address(addr2)
-        addr1_index = self.addresses.index(addr1)
-        addr2_index = self.addresses.index(addr2)
-        return self.distances[addr1_index][addr2_index]
+        return self.distance_by_index(self.getAddressIndex(addr1), self.getAddressIndex(addr2))
     
+    def distance_by_index(self, i, j):
+        """
+        Public method to get the distance between two address indexes.
+
+        Args:
+            i: Index of the first address.
+            j: Index of the second address.
+
+        Returns:
+            The distance between the two addresses
+        """
+        # Only the lower triangle is stored, row i starts at offset i(i+1)/2
+        if i < j:
+            i, j = j, i
+        return self.distances[i * (i + 1) // 2 + j]
+
+    def row(self, i):
+        """
+        Public method to get the distances from one address to every address.
+
+        Args:
+            i: Index of the address.
+
+        Returns:
+            A sequence of distances, indexable by address index.
+        """
+        offset = i * (i + 1) // 2
+        # Distances to addresses 0..i are stored contiguously, the rest are read down column i
+        distances = array('d', self.distances[offset:offset + i + 1])
+        distances.extend(self.distances[j * (j + 1) // 2 + i] for j in range(i + 1, self.count))
+        return distances
+
+    def distances_from(self, i, candidates):
+        """
+        Public method to get the distances from one address to many addresses in one call.
+
+        Args:
+            i: Index of the address.
+            candidates: Iterable of address indexes.
+
+        Returns:
+            An array of distances, in the order of the candidates.
+        """
+        distances = self.distances
+        # Same lower-triangle lookup as distance_by_index, without a method call per candidate
+        return array('d', [distances[i * (i + 1) // 2 + j] if j <= i else distances[j * (j + 1) // 2 + i] for j in candidates])
+
+    def neighbors(self, i):
+        """
+        Public method to get every address ordered by distance from an address.
+
+        Each address's list is sorted once, on first use, and reused afterwards.
+
+        Args:
+            i: Index of the address.
+
+        Returns:
+            An array of address indexes, nearest first (starting with the address itself).
+        """
+        if i not in self._neighbors:
+            distances = self.row(i)
+            self._neighbors[i] = array('i', sorted(range(self.count), key=lambda j: (distances[j], j != i)))
+        return self._neighbors[i]
+
+    def nearest(self, i, candidates):
+        """
+        Public method to find the nearest candidate address to an address.
+
+        Walks the address's neighbor list, skipping addresses that aren't candidates.
+
+        Args:
+            i: Index of the address.
+            candidates: Container of candidate address indexes, supporting the in operator.
+
+        Returns:
+            The index of the nearest candidate address, or None if there are no candidates.
+        """
+        if not candidates:
+            return None
+        for j in self.neighbors(i):
+            if j in candidates:
+                return j
+        return None
+
     def _normalize_address(self, addr):
         """
         Normalize the given address by converting it to lowercase and abbreviating cardinal directions.
@@ -99,4 +346,4 @@ if __name__ == "__main__":
     importer = AddressImporter('distances.csv')
     print(importer.addr_names)
     print(importer.addresses)
-    print(importer.distances)
+    print([list(importer.row(i)) for i in range(importer.count)])
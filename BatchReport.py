@@ -0,0 +1,161 @@
+import csv, json
+from datetime import datetime, timedelta
+
+from Package import PackageState
+from Instrumentation import instrumentation
+
+class BatchReport:
+    """
+    Answers many point-in-time status queries in a single sweep over the day's events.
+
+    Every package and truck timeline is merged into one time-ordered event list. Queries are
+    sorted and the sweep applies events up to each query time before reporting, so the total
+    work is O(events + queries) plus the size of the output.
+    """
+    # Columns written for every row, package and truck rows leave the other type's columns blank
+    FIELDS = ["time", "type", "id", "state", "truck", "address", "mileage", "packages"]
+
+    def __init__(self, pkgHashTable, trucks):
+        """
+        Initialize a BatchReport with given attributes.
+
+        Args:
+            pkgHashTable: The PackageStore after delivery.
+            trucks: The trucks after delivery.
+        """
+        self.pkgHashTable = pkgHashTable
+        self.trucks = trucks
+        self.events = self._mergeEvents()
+
+    def _mergeEvents(self):
+        """
+        Merge every package and truck timeline into one list.
+
+        Returns:
+            A list of (time, kind, ID, value) tuples sorted by time. The sort is stable, so
+            entries of one timeline sharing a time keep their recorded order.
+        """
+        events = []
+        for pkg in self.pkgHashTable:
+            events.extend((time, "state", pkg.id, state) for time, state in pkg.state_history)
+            events.extend((time, "truck", pkg.id, truckID) for time, truckID in pkg.truck_history)
+            events.extend((time, "address", pkg.id, address) for time, address in pkg.address_history)
+        for truck in self.trucks:
+            events.extend((time, "mileage", truck.id, mileage) for time, mileage in truck.mileage_log)
+        events.sort(key=lambda event: event[0])
+        return events
+
+    def lastEventTime(self):
+        """
+        Get the time of the last event of the day.
+
+        Returns:
+            The time of the last event, or None if there are no events.
+        """
+        return self.events[-1][0] if self.events else None
+
+    def sweep(self, times):
+        """
+        Report the status of every package and truck at each query time.
+
+        Events at exactly a query time are included, as in the Timeline.at() queries.
+
+        Args:
+            times: Iterable of query times, in any order.
+
+        Returns:
+            A generator of row dicts with the keys in FIELDS, in order of query time.
+        """
+        # Status before any event, matching the Timeline defaults
+        states = {pkg.id: PackageState.AT_HUB for pkg in self.pkgHashTable}
+        pkgTrucks = {pkg.id: None for pkg in self.pkgHashTable}
+        addresses = {pkg.id: pkg.address_history.values[0] for pkg in self.pkgHashTable}
+        mileages = {truck.id: 0 for truck in self.trucks}
+        loads = {truck.id: 0 for truck in self.trucks}
+
+        events = self.events
+        index = 0
+        for atTime in sorted(times):
+            # Apply every event up to and including the query time
+            while (index < len(events)) and (events[index][0] <= atTime):
+                _, kind, itemID, value = events[index]
+                if kind == "state":
+                    states[itemID] = value
+                elif kind == "truck":
+                    # Keep the number of packages on each truck up to date
+                    if pkgTrucks[itemID] in loads:
+                        loads[pkgTrucks[itemID]] -= 1
+                    if value in loads:
+                        loads[value] += 1
+                    pkgTrucks[itemID] = value
+                elif kind == "address":
+                    addresses[itemID] = value
+                elif kind == "mileage":
+                    mileages[itemID] = value
+                index += 1
+
+            timeStr = (datetime.min + atTime).strftime("%H:%M")
+            for pkgID in sorted(states):
+                yield {"time": timeStr, "type": "package", "id": pkgID, "state": states[pkgID].value,
+                       "truck": pkgTrucks[pkgID], "address": ", ".join(map(str, addresses[pkgID])),
+                       "mileage": None, "packages": None}
+            for truck in self.trucks:
+                yield {"time": timeStr, "type": "truck", "id": truck.id, "state": None,
+                       "truck": None, "address": None, "mileage": round(mileages[truck.id], 1),
+                       "packages": loads[truck.id]}
+
+    def write(self, times, file, format="csv"):
+        """
+        Write the sweep's rows to a file.
+
+        Args:
+            times: Iterable of query times.
+            file: Open text file to write to.
+            format: "csv" or "jsonl". Defaults to "csv".
+
+        Raises:
+            ValueError: If the format is unknown.
+
+        Returns:
+            The number of rows written.
+        """
+        if format not in ("csv", "jsonl"):
+            raise ValueError(f"Unknown batch report format: {format}")
+
+        count = 0
+        with instrumentation.span("report", format=format):
+            if format == "csv":
+                writer = csv.DictWriter(file, fieldnames=self.FIELDS)
+                writer.writeheader()
+                for row in self.sweep(times):
+                    writer.writerow(row)
+                    count += 1
+            else:
+                for row in self.sweep(times):
+                    file.write(json.dumps(row) + "\n")
+                    count += 1
+        return count
+
+    @staticmethod
+    def timesEvery(start, end, step=timedelta(minutes=5)):
+        """
+        Get evenly spaced query times.
+
+        Args:
+            start: The first time.
+            end: The last possible time, included if it falls on a step.
+            step: Time between queries. Defaults to 5 minutes.
+
+        Returns:
+            A list of times.
+
+        Raises:
+            ValueError: If step isn't positive.
+        """
+        if step <= timedelta(0):
+            raise ValueError(f"Step must be positive, got {step}")
+        times = []
+        while start <= end:
+            times.append(start)
+            start += step
+        return times
@@ -0,0 +1,206 @@
+import csv, math
+from array import array
+from functools import lru_cache
+
+from AddressImporter import AddressImporter
+
+class CoordinateDistances(AddressImporter):
+    """
+    A distance provider that computes distances from address coordinates on demand.
+
+    It offers the same interface as AddressImporter, but keeps no distance table, so memory
+    grows with the number of addresses rather than its square. Single distances go through
+    a bounded LRU cache of recently used pairs, and distances_from() answers a whole batch
+    of candidates in one call.
+
+    The CSV file has a header row and the columns Name, Address, Zip, X, Y. For "euclidean"
+    distances X and Y are in miles, for "haversine" they are longitude and latitude in degrees.
+    """
+    # Mean radius of the Earth in miles, for haversine distances
+    EARTH_RADIUS = 3958.8
+    METRICS = ("euclidean", "haversine")
+
+    def __init__(self, file, metric="euclidean", road_factor=1.0, cache_size=100000, neighbor_cache_size=64, shared=None):
+        """
+        Initialize the CoordinateDistances with the given CSV file.
+
+        Args:
+            file: Path to the CSV file containing address coordinates.
+            metric: "euclidean" or "haversine". Defaults to "euclidean".
+            road_factor: Multiplier from straight-line to road distance. Defaults to 1.0.
+            cache_size: Most address pairs kept in the distance cache. Defaults to 100000.
+            neighbor_cache_size: Most sorted neighbor lists kept. Defaults to 64.
+            shared: Settings returned by another CoordinateDistances's share(). Defaults to None.
+        """
+        if shared is not None:
+            metric, road_factor, cache_size, neighbor_cache_size = shared["metric"], shared["road_factor"], \
+                shared["cache_size"], shared["neighbor_cache_size"]
+        if metric not in self.METRICS:
+            raise ValueError(f"Unknown distance metric: {metric}")
+        self.file = file
+        self.metric = metric
+        self.road_factor = road_factor
+        self.cache_size = cache_size
+        self.neighbor_cache_size = neighbor_cache_size
+        self.count = 0
+        self.addr_names = []
+        self.addresses = []
+        self.address_index = {}
+        self.xs = array('d') # X (or longitude, in radians for haversine) of each address
+        self.ys = array('d') # Y (or latitude, in radians for haversine) of each address
+        self._import_file()
+        self.hub_index = self.getAddressIndex("HUB")
+
+        # Bounded caches, created per instance so each provider has its own
+        self._cached_distance = lru_cache(maxsize=cache_size)(self._compute)
+        self.neighbors = lru_cache(maxsize=neighbor_cache_size)(self._sorted_neighbors)
+
+    def _import_file(self):
+        """
+        Private method to read the names, addresses and coordinates from the CSV file.
+        """
+        toRadians = (self.metric == "haversine") and math.radians or float
+        with open(self.file, 'r', newline='') as file:
+            csv_reader = csv.reader(file)
+            next(csv_reader, None) # Skip the headers
+            for row in csv_reader:
+                if len(row) == 0:
+                    continue
+                self.addr_names.append(row[0].strip())
+                address = self._normalize_address(row[1].strip())
+                self.addresses.append(address)
+                self.address_index[address] = self.count
+                self.xs.append(toRadians(float(row[3])))
+                self.ys.append(toRadians(float(row[4])))
+                self.count += 1
+
+    def _compute(self, i, j):
+        """
+        Private method to calculate the road distance between two addresses.
+
+        Args:
+            i: Index of the first address.
+            j: Index of the second address.
+
+        Returns:
+            The distance in miles.
+        """
+        if self.metric == "euclidean":
+            return math.hypot(self.xs[i] - self.xs[j], self.ys[i] - self.ys[j]) * self.road_factor
+        lat1, lat2 = self.ys[i], self.ys[j]
+        a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((self.xs[j] - self.xs[i]) / 2) ** 2
+        return 2 * self.EARTH_RADIUS * math.asin(math.sqrt(a)) * self.road_factor
+
+    def distance_by_index(self, i, j):
+        """
+        Public method to get the distance between two address indexes.
+
+        Args:
+            i: Index of the first address.
+            j: Index of the second address.
+
+        Returns:
+            The distance between the two addresses
+        """
+        # Distances are symmetric, so both orders share a cache entry
+        if i < j:
+            i, j = j, i
+        return self._cached_distance(i, j)
+
+    def distances_from(self, i, candidates):
+        """
+        Public method to get the distances from one address to many addresses in one call.
+
+        Distances are calculated directly in a single loop, bypassing the pair cache.
+
+        Args:
+            i: Index of the address.
+            candidates: Iterable of address indexes.
+
+        Returns:
+            An array of distances, in the order of the candidates.
+        """
+        xs, ys = self.xs, self.ys
+        x, y = xs[i], ys[i]
+        factor = self.road_factor
+        if self.metric == "euclidean":
+            hypot = math.hypot
+            return array('d', [hypot(x - xs[j], y - ys[j]) * factor for j in candidates])
+        sin, cos, asin, sqrt = math.sin, math.cos, math.asin, math.sqrt
+        cosLat = cos(y)
+        scale = 2 * self.EARTH_RADIUS * factor
+        return array('d', [scale * asin(sqrt(sin((ys[j] - y) / 2) ** 2 + cosLat * cos(ys[j]) * sin((xs[j] - x) / 2) ** 2))
+                           for j in candidates])
+
+    def row(self, i):
+        """
+        Public method to get the distances from one address to every address.
+
+        Args:
+            i: Index of the address.
+
+        Returns:
+            An array of distances, indexable by address index.
+        """
+        return self.distances_from(i, range(self.count))
+
+    def _sorted_neighbors(self, i):
+        """
+        Private method to sort every address by distance from an address.
+
+        Only the most recently used lists are kept, see neighbors().
+
+        Args:
+            i: Index of the address.
+
+        Returns:
+            An array of address indexes, nearest first (starting with the address itself).
+        """
+        distances = self.row(i)
+        return array('i', sorted(range(self.count), key=lambda j: (distances[j], j != i)))
+
+    def nearest(self, i, candidates):
+        """
+        Public method to find the nearest candidate address to an address.
+
+        Scores only the candidates with one distances_from() call, instead of walking a full neighbor list.
+
+        Args:
+            i: Index of the address.
+            candidates: Iterable of candidate address indexes.
+
+        Returns:
+            The index of the nearest candidate address, or None if there are no candidates.
+        """
+        if not candidates:
+            return None
+        candidates = list(candidates)
+        distances = self.distances_from(i, candidates)
+        # Ties go to the address itself, then to the lowest index, as in AddressImporter
+        return min(zip(distances, candidates), key=lambda item: (item[0], item[1] != i, item[1]))[1]
+
+    def cache_info(self):
+        """
+        Get hit and miss counts of the distance cache.
+
+        Returns:
+            The functools.lru_cache statistics of the pair cache.
+        """
+        return self._cached_distance.cache_info()
+
+    def share(self):
+        """
+        Public method to get the settings other processes need to build the same provider.
+
+        Nothing is placed in shared memory, workers read the coordinate file themselves.
+
+        Returns:
+            A picklable dict to pass to CoordinateDistances(file, shared=...) in another process.
+        """
+        return {"metric": self.metric, "road_factor": self.road_factor, "cache_size": self.cache_size,
+                "neighbor_cache_size": self.neighbor_cache_size}
+
+    def unshare(self):
+        """
+        Public method to match AddressImporter.unshare(), there is nothing to release.
+        """
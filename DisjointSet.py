@@ -0,0 +1,75 @@
+class DisjointSet:
+    """
+    A disjoint-set (union-find) structure with path compression and union by size.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty disjoint set.
+        """
+        self.parent = {} # Item -> parent item, roots are their own parent
+        self.size = {} # Root item -> number of items in its set
+
+    def add(self, item):
+        """
+        Add an item as its own set, if it isn't already present.
+
+        Args:
+            item: The item to add.
+        """
+        if item not in self.parent:
+            self.parent[item] = item
+            self.size[item] = 1
+
+    def find(self, item):
+        """
+        Find the representative (root) of an item's set.
+
+        Args:
+            item: The item to look up, added if not present.
+
+        Returns:
+            The root item of the set containing the item.
+        """
+        self.add(item)
+        root = item
+        while self.parent[root] != root:
+            root = self.parent[root]
+        # Path compression, point every item on the path directly at the root
+        while self.parent[item] != root:
+            self.parent[item], item = root, self.parent[item]
+        return root
+
+    def union(self, item1, item2):
+        """
+        Merge the sets containing two items.
+
+        Args:
+            item1: An item in the first set.
+            item2: An item in the second set.
+
+        Returns:
+            The root of the merged set.
+        """
+        root1 = self.find(item1)
+        root2 = self.find(item2)
+        if root1 == root2:
+            return root1
+        # Union by size, attach the smaller tree under the larger one
+        if self.size[root1] < self.size[root2]:
+            root1, root2 = root2, root1
+        self.parent[root2] = root1
+        self.size[root1] += self.size.pop(root2)
+        return root1
+
+    def groups(self):
+        """
+        Get every set in the structure.
+
+        Returns:
+            A list of lists of items, one per set, in the order items were added.
+        """
+        groups = {}
+        for item in self.parent:
+            groups.setdefault(self.find(item), []).append(item)
+        return list(groups.values())
@@ -0,0 +1,120 @@
+import math
+
+class ExactSequencer:
+    """
+    Finds the shortest delivery order for a truck load with the Held-Karp bitmask dynamic program.
+
+    Packages are grouped by address, so the program runs over distinct stops. Deadlines are
+    enforced by discarding partial routes that reach a stop after its earliest deadline. The
+    shortest partial route to a state is also the earliest, so this pruning stays exact.
+    """
+
+    def __init__(self, addressImporter, pkgHashTable, max_stops=12):
+        """
+        Initialize an ExactSequencer with given attributes.
+
+        Args:
+            addressImporter: The AddressImporter holding the distance matrix.
+            pkgHashTable: The PackageStore containing all packages.
+            max_stops: Most distinct stops solved exactly, larger loads are left to the heuristics. Defaults to 12.
+        """
+        self.addressImporter = addressImporter
+        self.pkgHashTable = pkgHashTable
+        self.max_stops = max_stops
+        self.memo = {} # (stops, mileage limits) -> (stop order, miles), or None if infeasible
+
+    def sequence(self, truck):
+        """
+        Get the shortest deadline-feasible order of the packages on a truck.
+
+        Args:
+            truck: The truck to sequence, leaving the HUB at its current time.
+
+        Returns:
+            A tuple of (list of package IDs, miles for the round trip), or None if the load has
+            more than max_stops stops or no order meets every deadline.
+        """
+        # Group packages by address, in a canonical order so equal loads share a memo entry
+        stopPkgs = {}
+        for pkgID in truck.packageIDs:
+            pkg = self.pkgHashTable.lookup(pkgID)
+            stopPkgs.setdefault(pkg.address_id, []).append(pkg)
+        stops = tuple(sorted(stopPkgs))
+        if (len(stops) == 0) or (len(stops) > self.max_stops):
+            return None
+
+        # Convert each stop's earliest deadline into the most miles that can be driven before reaching it
+        limits = []
+        for stop in stops:
+            deadlines = [pkg.deadline for pkg in stopPkgs[stop] if pkg.deadline is not None]
+            if deadlines:
+                limits.append((min(deadlines) - truck.current_time).total_seconds() / 3600 * truck.speed)
+            else:
+                limits.append(math.inf)
+        limits = tuple(limits)
+
+        key = (stops, limits)
+        if key not in self.memo:
+            self.memo[key] = self._solve(stops, limits)
+        if self.memo[key] is None:
+            return None
+
+        order, miles = self.memo[key]
+        return [pkg.id for stop in order for pkg in sorted(stopPkgs[stop], key=lambda pkg: pkg.id)], miles
+
+    def _solve(self, stops, limits):
+        """
+        Run the Held-Karp dynamic program over a set of stops.
+
+        Args:
+            stops: Tuple of address indexes to visit.
+            limits: Tuple of the most miles driven before reaching each stop.
+
+        Returns:
+            A tuple of (tuple of address indexes in visiting order, miles for the round trip),
+            or None if no order meets every limit.
+        """
+        distance = self.addressImporter.distance_by_index
+        hub = self.addressImporter.hub_index
+        count = len(stops)
+        full = (1 << count) - 1
+        fromHub = [distance(hub, stop) for stop in stops]
+        between = [[distance(stop, other) for other in stops] for stop in stops]
+
+        # best[mask][j]: shortest route from the HUB visiting the stops in mask, ending at stop j
+        best = [[math.inf] * count for _ in range(full + 1)]
+        previous = [[-1] * count for _ in range(full + 1)]
+        for j in range(count):
+            if fromHub[j] <= limits[j]:
+                best[1 << j][j] = fromHub[j]
+
+        for mask in range(1, full + 1):
+            layer = best[mask]
+            for j in range(count):
+                miles = layer[j]
+                if miles == math.inf:
+                    continue
+                row = between[j]
+                for k in range(count):
+                    if mask & (1 << k):
+                        continue
+                    nextMiles = miles + row[k]
+                    nextMask = mask | (1 << k)
+                    if (nextMiles < best[nextMask][k]) and (nextMiles <= limits[k]):
+                        best[nextMask][k] = nextMiles
+                        previous[nextMask][k] = j
+
+        # Close the tour back at the HUB
+        totals = [best[full][j] + fromHub[j] for j in range(count)]
+        last = min(range(count), key=totals.__getitem__)
+        miles = totals[last]
+        if miles == math.inf:
+            return None
+
+        # Walk the parent pointers back to the first stop
+        order = []
+        mask = full
+        while last != -1:
+            order.append(stops[last])
+            mask, last = mask & ~(1 << last), previous[mask][last]
+        return tuple(reversed(order)), miles
@@ -3,14 +3,25 @@ class HashTable:
     A simple implementation of a hash table using chaining for collision resolution.
     """
 
-    def __init__(self, size=40):
+    def __init__(self, size=40, load_factor=0.75):
         """
         Initialize the hash table with a given size.
 
+        The table doubles its number of buckets whenever the number of stored items
+        exceeds load_factor times the number of buckets.
+
         Args:
-            size: The size of the hash table. Defaults to 40.
+            size: The initial size of the hash table. Defaults to 40.
+            load_factor: Maximum average items per bucket before resizing. Defaults to 0.75.
         """
+        if size < 1:
+            raise ValueError("size must be at least 1")
+        if load_factor <= 0:
+            raise ValueError("load_factor must be greater than 0")
         self.size = size
+        self.load_factor = load_factor
+        self.count = 0 # Number of items stored
+        self.resize_count = 0 # Number of times the table has grown
         self.table = [[] for _ in range(self.size)]
 
     def __str__(self):
@@ -22,6 +33,26 @@ class HashTable:
         """
         return str(self.table)
 
+    def __len__(self):
+        """
+        Get the number of items in the hash table.
+
+        Returns:
+            The number of stored packages.
+        """
+        return self.count
+
+    def __contains__(self, pkgID):
+        """
+        Check if a key is in the hash table.
+
+        Args:
+            pkgID: The key to look for.
+
+        Returns:
+            True if the key is found, False otherwise.
+        """
+        return any(item[0] == pkgID for item in self.table[self._hash(pkgID)])
     
     def _hash(self, key):
         """
@@ -42,22 +73,98 @@ class HashTable:
         If the key already exists, update its value.
 
         Args:
-            key: The key to be inserted.
-            value: The value associated with the key.
+            pkg: The package to be inserted, keyed by its ID.
         """
         hash_key = self._hash(pkg.id)
         for item in self.table[hash_key]:
             if item[0] == pkg.id:
-                item[1] == pkg
+                item[1] = pkg
                 return
         self.table[hash_key].append([pkg.id, pkg])
+        self.count += 1
+        if self.count > self.load_factor * self.size:
+            self._resize(self.size * 2)
+
+    def insertMany(self, pkgs):
+        """
+        Insert several key-value pairs, growing the table at most once.
+
+        Args:
+            pkgs: List of packages to be inserted, keyed by their IDs.
+        """
+        self.reserve(len(pkgs))
+        for pkg in pkgs:
+            self.insert(pkg)
+
+    def reserve(self, count):
+        """
+        Grow the table so that count more items can be inserted without resizing.
+
+        Args:
+            count: Number of items about to be inserted.
+        """
+        size = self.size
+        while self.count + count > self.load_factor * size:
+            size *= 2
+        if size != self.size:
+            self._resize(size)
+
+    def delete(self, pkgID):
+        """
+        Remove a key and its value from the hash table.
+
+        Args:
+            pkgID: The key to remove.
+
+        Returns:
+            The removed value, or None if the key is not found.
+        """
+        bucket = self.table[self._hash(pkgID)]
+        for i, item in enumerate(bucket):
+            if item[0] == pkgID:
+                del bucket[i]
+                self.count -= 1
+                return item[1]
+        return None
+
+    def _resize(self, size):
+        """
+        Rehash every item into a table with the given number of buckets.
+
+        Args:
+            size: The new size of the hash table.
+        """
+        oldTable = self.table
+        self.size = size
+        self.table = [[] for _ in range(self.size)]
+        for bucket in oldTable:
+            for item in bucket:
+                self.table[self._hash(item[0])].append(item)
+        self.resize_count += 1
+
+    def stats(self):
+        """
+        Get occupancy statistics for the hash table.
+
+        Returns:
+            A dict with the bucket count, item count, load, max and mean chain length, and resize count.
+        """
+        chainLengths = [len(bucket) for bucket in self.table if bucket]
+        return {
+            "buckets": self.size,
+            "items": self.count,
+            "load": self.count / self.size,
+            "max_chain": max(chainLengths, default=0),
+            "mean_chain": chainLengths and sum(chainLengths) / len(chainLengths) or 0.0,
+            "resizes": self.resize_count,
+        }
 
     def lookup(self, pkgID):
         """
         Look up a value in the hash table by its key.
 
         Args:
-            key: The key to look up.
+            pkgID: The key to look up.
 
         Returns:
             The value associated with the key, or None if the key is not found.
@@ -1,5 +1,8 @@
 from datetime import datetime, timedelta
 
+from Package import PackageState
+from Instrumentation import instrumentation
+
 class InfoUI:
     """
     A user interface class for displaying package tracking and delivery status information.
@@ -71,25 +74,27 @@ class InfoUI:
             self._generate_report()
 
     def _generate_package_report(self, atTime=None):
-        pkgReport = [None] * (max([pkg.id for pkg in self.pkgHashTable]) + 1)
-        truckPkgIDs = [[] for _ in range(len(self.trucks) + 1)]
+        with instrumentation.span("report", atTime=str(atTime)):
+            pkgReport = [None] * (max([pkg.id for pkg in self.pkgHashTable]) + 1)
+            truckPkgIDs = [[] for _ in range(len(self.trucks) + 1)]
         
-        for pkg in self.pkgHashTable:
-            if atTime:
-                alreadyLoaded = any(["Loaded on truck" in x[0] for x in pkg.status if x[1] <= atTime])
-                alreadyDelivered = any(["Delivered" in x[0] for x in pkg.status if x[1] <= atTime])
-                pkgReport[pkg.id] = f"Package #{pkg.id:02}: " + \
-                    (alreadyLoaded and f"Loaded at {(datetime.min + [x[1] for x in pkg.status if 'Loaded on truck' in x[0]][0]).strftime('%I:%M %p')}, " or "Not Loaded , ") + \
-                    (alreadyDelivered and f"Delivered at {(datetime.min + [x[1] for x in pkg.status if 'Delivered' in x[0]][0]).strftime('%I:%M %p')}," or "Not Delivered, ") + \
-                    f"Deadline: {pkg.deadline and (datetime.min + pkg.deadline).strftime('%I:%M %p') or "EOD"}\n" + \
-                    f"    Address: {pkg.getAddress(atTime)}"
-            else:
-                pkgReport[pkg.id] = f"Package #{pkg.id:02}: " + \
-                    f"Loaded at {(datetime.min + [x[1] for x in pkg.status if 'Loaded on truck' in x[0]][0]).strftime('%I:%M %p')}, " + \
-                    f"Delivered at {(datetime.min + [x[1] for x in pkg.status if 'Delivered' in x[0]][0]).strftime('%I:%M %p')}, " + \
-                    f"Deadline: {pkg.deadline and (datetime.min + pkg.deadline).strftime('%I:%M %p') or "EOD"}\n" + \
-                    f"    Address: {pkg.getAddress()}"
-            truckPkgIDs[pkg.isOnTruck()].append(pkg.id)
+            for pkg in self.pkgHashTable:
+                if atTime:
+                    state = pkg.state_at(atTime)
+                    alreadyLoaded = state != PackageState.AT_HUB
+                    alreadyDelivered = state == PackageState.DELIVERED
+                    pkgReport[pkg.id] = f"Package #{pkg.id:02}: " + \
+                        (alreadyLoaded and f"Loaded at {(datetime.min + pkg.load_time).strftime('%I:%M %p')}, " or "Not Loaded , ") + \
+                        (alreadyDelivered and f"Delivered at {(datetime.min + pkg.delivery_time).strftime('%I:%M %p')}," or "Not Delivered, ") + \
+                        f"Deadline: {pkg.deadline and (datetime.min + pkg.deadline).strftime('%I:%M %p') or "EOD"}\n" + \
+                        f"    Address: {pkg.getAddress(atTime)}"
+                else:
+                    pkgReport[pkg.id] = f"Package #{pkg.id:02}: " + \
+                        f"Loaded at {(datetime.min + pkg.load_time).strftime('%I:%M %p')}, " + \
+                        f"Delivered at {(datetime.min + pkg.delivery_time).strftime('%I:%M %p')}, " + \
+                        f"Deadline: {pkg.deadline and (datetime.min + pkg.deadline).strftime('%I:%M %p') or "EOD"}\n" + \
+                        f"    Address: {pkg.getAddress()}"
+                truckPkgIDs[pkg.isOnTruck()].append(pkg.id)
         
         return pkgReport, truckPkgIDs
 
@@ -114,14 +119,14 @@ class InfoUI:
 --------------------------------------------------------------------
 """)
 
-        totalMiles = sum([truck.mileage if not atTime else [x[0] for x in truck.mileage_log if x[1] <= atTime][-1] for truck in self.trucks])
+        totalMiles = sum([truck.mileage if not atTime else truck.mileage_at(atTime) for truck in self.trucks])
         print(f"Total Mileage Traveled by All Trucks{(' at ' + (datetime.min + atTime).strftime('%I:%M %p')) if atTime else ''}: {totalMiles:06.1f}")
         print()
 
         pkgReport, truckPkgIDs = self._generate_package_report(atTime)
 
         for truckID in range(1, len(self.trucks) + 1):
-            mileage = self.trucks[truckID-1].mileage if not atTime else [x[0] for x in self.trucks[truckID-1].mileage_log if x[1] <= atTime][-1]
+            mileage = self.trucks[truckID-1].mileage if not atTime else self.trucks[truckID-1].mileage_at(atTime)
             self._print_truck_packages(truckID, pkgReport, truckPkgIDs, mileage, atTime)
 
         self._waitToContinue()
@@ -151,7 +156,7 @@ class InfoUI:
             if atTime:
                 print(self.trucks[itemID].__str__(atTime))
                 pkgReport, truckPkgIDs = self._generate_package_report(atTime)
-                mileage = [x[0] for x in self.trucks[itemID].mileage_log if x[1] <= atTime][-1]
+                mileage = self.trucks[itemID].mileage_at(atTime)
                 self._print_truck_packages(itemID + 1, pkgReport, truckPkgIDs, mileage, atTime)
             else:
                 print(self.trucks[itemID])
@@ -178,7 +183,7 @@ class InfoUI:
         if atTime:
             totalMiles = 0
             for truck in self.trucks:
-                totalMiles += [x[0] for x in truck.mileage_log if x[1] <= atTime][-1]
+                totalMiles += truck.mileage_at(atTime)
             print(f"Total Mileage Traveled by All Trucks at {(datetime.min + atTime).strftime("%I:%M %p")}: {totalMiles:06.1f} miles")
         else:
             totalMiles = sum([truck.mileage for truck in self.trucks])
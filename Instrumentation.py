@@ -0,0 +1,208 @@
+import atexit, cProfile, json, pstats, time, tracemalloc
+from contextlib import nullcontext
+from functools import wraps
+
+class Instrumentation:
+    """
+    Opt-in counters, timers and phase spans, exported as JSON at exit.
+
+    Nothing is measured until enable() is called. Hot-path methods are only wrapped with
+    counting timers while enabled, and span() returns a shared do-nothing context manager
+    while disabled, so the disabled overhead is a single attribute check per span.
+    """
+    # Methods wrapped with call counters and cumulative timers, as (module, class, method)
+    HOT_PATHS = (
+        ("AddressImporter", "AddressImporter", "distance"),
+        ("AddressImporter", "AddressImporter", "distance_by_index"),
+        ("AddressImporter", "AddressImporter", "nearest"),
+        ("CoordinateDistances", "CoordinateDistances", "distance_by_index"),
+        ("CoordinateDistances", "CoordinateDistances", "distances_from"),
+        ("CoordinateDistances", "CoordinateDistances", "nearest"),
+        ("HashTable", "HashTable", "lookup"),
+        ("Package", "Package", "isOnTruck"),
+        ("Package", "Package", "transition"),
+        ("Routing", "Routing", "loadPackagesOntoTruck"),
+        ("Routing", "Routing", "_getLoadablePackages"),
+        ("RoutingStrategy", "RoutingStrategy", "_pick"),
+        ("Partitioner", "Partitioner", "partition"),
+        ("RouteOptimizer", "RouteOptimizer", "optimize"),
+        ("ExactSequencer", "ExactSequencer", "sequence"),
+    )
+    # Number of functions listed in the cProfile summary
+    PROFILE_TOP = 30
+
+    def __init__(self):
+        """
+        Initialize a disabled Instrumentation.
+        """
+        self.enabled = False
+        self.file = None # JSON file written at exit
+        self.counters = {} # "Class.method" -> [calls, seconds]
+        self.spans = [] # Finished spans, dicts of name, start, seconds, depth and extra fields
+        self.depth = 0 # Number of open spans
+        self.startTime = None
+        self.profiler = None
+        self._originals = [] # (class, method name, original function) replaced by enable()
+        self._null = nullcontext()
+
+    def enable(self, file=None, profile=False, memory=False):
+        """
+        Start measuring.
+
+        Args:
+            file: JSON file to write the results to at exit. Defaults to None (no export).
+            profile: Also run cProfile. Defaults to False.
+            memory: Also trace memory allocations with tracemalloc. Defaults to False.
+        """
+        if self.enabled:
+            return
+        self.enabled = True
+        self.file = file
+        self.startTime = time.perf_counter()
+        for moduleName, className, methodName in self.HOT_PATHS:
+            cls = getattr(__import__(moduleName), className)
+            original = cls.__dict__[methodName]
+            setattr(cls, methodName, self._wrap(original, f"{className}.{methodName}"))
+            self._originals.append((cls, methodName, original))
+        if memory:
+            tracemalloc.start()
+        if profile:
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        if file:
+            atexit.register(self.export)
+
+    def disable(self):
+        """
+        Stop measuring and restore the original hot-path methods. Results are kept.
+        """
+        if self.profiler:
+            self.profiler.disable()
+        for cls, methodName, original in reversed(self._originals):
+            setattr(cls, methodName, original)
+        self._originals = []
+        self.enabled = False
+
+    def _wrap(self, function, name):
+        """
+        Wrap a function with a call counter and cumulative timer.
+
+        Args:
+            function: The function to wrap.
+            name: Counter name.
+
+        Returns:
+            The wrapping function.
+        """
+        counter = self.counters.setdefault(name, [0, 0.0])
+        clock = time.perf_counter
+
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                counter[0] += 1
+                counter[1] += clock() - start
+        return wrapper
+
+    def span(self, name, **fields):
+        """
+        Measure a phase, used as a context manager.
+
+        Args:
+            name: Name of the phase.
+            **fields: Extra values stored with the span.
+
+        Returns:
+            A context manager timing the phase, or a do-nothing one when disabled.
+        """
+        if not self.enabled:
+            return self._null
+        return _Span(self, name, fields)
+
+    def record(self, name, start, seconds, **fields):
+        """
+        Store a finished span.
+
+        Args:
+            name: Name of the phase.
+            start: perf_counter() value when the phase started.
+            seconds: Wall-clock duration of the phase.
+            **fields: Extra values stored with the span.
+        """
+        if self.enabled:
+            self.spans.append({"name": name, "start": start - self.startTime, "seconds": seconds,
+                               "depth": self.depth, **fields})
+
+    def results(self):
+        """
+        Collect the measurements.
+
+        Returns:
+            A dict of counters, span totals by name, every span, and profile and memory summaries if captured.
+        """
+        totals = {}
+        for span in self.spans:
+            total = totals.setdefault(span["name"], {"count": 0, "seconds": 0.0})
+            total["count"] += 1
+            total["seconds"] += span["seconds"]
+
+        results = {
+            "counters": {name: {"calls": calls, "seconds": seconds} for name, (calls, seconds) in self.counters.items() if calls},
+            "phases": totals,
+            "spans": self.spans,
+        }
+        if self.profiler:
+            self.profiler.disable()
+            stats = pstats.Stats(self.profiler).sort_stats("cumulative")
+            results["profile"] = [
+                {"function": f"{file}:{line}({function})", "calls": calls, "total": total, "cumulative": cumulative}
+                for (file, line, function), (_, calls, total, cumulative, _) in
+                sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)[:self.PROFILE_TOP]
+            ]
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            results["memory"] = {
+                "current": current,
+                "peak": peak,
+                "top": [{"location": str(stat.traceback), "size": stat.size, "count": stat.count}
+                        for stat in tracemalloc.take_snapshot().statistics("lineno")[:self.PROFILE_TOP]],
+            }
+        return results
+
+    def export(self, file=None):
+        """
+        Write the measurements as JSON.
+
+        Args:
+            file: Path to write to. Defaults to None (the file given to enable()).
+        """
+        with open(file or self.file, "w") as output:
+            json.dump(self.results(), output, indent=2)
+
+class _Span:
+    """
+    Context manager measuring one span for Instrumentation.span().
+    """
+    __slots__ = ("instrumentation", "name", "fields", "start")
+
+    def __init__(self, instrumentation, name, fields):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.fields = fields
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.instrumentation.depth += 1
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        self.instrumentation.depth -= 1
+        self.instrumentation.record(self.name, self.start, seconds, **self.fields)
+        return False
+
+# Shared instance used throughout the program
+instrumentation = Instrumentation()
@@ -0,0 +1,187 @@
+import multiprocessing, random, time, warnings
+from datetime import timedelta
+
+from PackageImporter import PackageImporter
+from PackageStore import PackageStore
+from Driver import Driver
+from Truck import Truck
+from Routing import Routing
+from RouteOptimizer import RouteOptimizer
+from Partitioner import Partitioner
+from ExactSequencer import ExactSequencer
+from RoutingStrategy import STRATEGIES
+from Instrumentation import instrumentation
+
+class MultiStart:
+    """
+    Builds the day's delivery plan, optionally trying many randomized constructions in parallel.
+
+    Each start runs the whole routing pipeline with its own random seed, in a pool of worker
+    processes. Workers read the distance matrix from shared memory instead of receiving a copy.
+    Only the seed and score of each start come back, the best seed is then replayed locally.
+    """
+    # MultiStart built in each worker process by _initWorker
+    _worker = None
+
+    def __init__(self, addressImporter, packageFile, addressCorrections=None, numTrucks=2,
+                 startTime=timedelta(hours=8, minutes=0), strategyName="nearest", partition=False):
+        """
+        Initialize a MultiStart with given attributes.
+
+        Args:
+            addressImporter: The AddressImporter holding the distance matrix.
+            packageFile: Path to the CSV file containing package data.
+            addressCorrections: Corrected addresses for PackageImporter. Defaults to None.
+            numTrucks: Number of trucks (with drivers) delivering packages. Defaults to 2.
+            startTime: Time the trucks start their routes. Defaults to 8:00 AM.
+            strategyName: Name of the RoutingStrategy in STRATEGIES. Defaults to "nearest".
+            partition: Split packages into one geographic cluster per truckload before loading. Defaults to False.
+        """
+        self.addressImporter = addressImporter
+        self.packageFile = packageFile
+        self.addressCorrections = addressCorrections
+        self.numTrucks = numTrucks
+        self.startTime = startTime
+        self.strategyName = strategyName
+        self.partition = partition
+        self.importStats = {} # Row counts and throughput of the last package import
+
+    def simulate(self, seed=None):
+        """
+        Import the packages, load them onto the trucks and deliver them.
+
+        Args:
+            seed: Seed for randomized package selection. Defaults to None (deterministic).
+
+        Returns:
+            A tuple of (PackageStore, list of trucks, Routing).
+        """
+        # Import Packages from the csv file and insert them into the PackageStore (an indexed HashTable)
+        # Packages are streamed into the store in chunks instead of building a full list first
+        with instrumentation.span("import"):
+            pkgImporter = PackageImporter(self.packageFile, self.addressImporter, self.addressCorrections, stream=True)
+            pkgHashTable = PackageStore(10)
+            pkgImporter.importInto(pkgHashTable)
+            self.importStats = pkgImporter.stats
+
+        # Initialize Trucks and Drivers
+        trucks = [Truck(id, self.startTime) for id in range(1, self.numTrucks + 1)]
+        drivers = [Driver(id, trucks) for id in range(1, self.numTrucks + 1)]
+
+        # Create Routing instance
+        # This handles package dependencies and other special cases
+        # Uses the selected strategy to load and order packages, then improves each route with 2-opt/Or-opt
+        # Loads with few enough stops are ordered exactly instead
+        # Clusters are sized to the smallest truck, so any truck can take any cluster
+        rng = seed is not None and random.Random(seed) or None
+        strategy = STRATEGIES[self.strategyName](self.addressImporter, pkgHashTable, rng)
+        routeOptimizer = RouteOptimizer(self.addressImporter, pkgHashTable)
+        exactSequencer = ExactSequencer(self.addressImporter, pkgHashTable)
+        partitioner = self.partition and Partitioner(self.addressImporter, min(truck.capacity for truck in trucks)) or None
+        router = Routing(self.addressImporter, pkgHashTable, routeOptimizer, exactSequencer, strategy, partitioner)
+
+        # Deliver packages
+        # Each truck loads when it leaves the HUB, starting with the start-of-day load
+        router.deliverPackages(trucks)
+
+        return pkgHashTable, trucks, router
+
+    @staticmethod
+    def score(pkgHashTable, trucks):
+        """
+        Score a simulated day, lower is better.
+
+        Args:
+            pkgHashTable: The PackageStore after delivery.
+            trucks: The trucks after delivery.
+
+        Returns:
+            A tuple of (number of late or undelivered packages, total miles).
+        """
+        late = sum(1 for pkg in pkgHashTable
+                   if (not pkg.isDelivered()) or (pkg.deadline is not None and pkg.delivery_time > pkg.deadline))
+        return late, sum(truck.mileage for truck in trucks)
+
+    def run(self, runs=8, workers=None, time_limit=10.0):
+        """
+        Run randomized constructions in parallel and find the best one.
+
+        The first start is the deterministic construction, so the result is never worse than it
+        if it finishes. When the time limit passes, the worker processes are terminated and
+        the best start finished so far is used.
+
+        Args:
+            runs: Number of starts. Defaults to 8.
+            workers: Number of worker processes. Defaults to the number of CPUs.
+            time_limit: Wall-clock seconds to wait for results. Defaults to 10.0.
+
+        Returns:
+            A tuple of (best seed, or None for the deterministic construction, best score), or
+            (None, None) if no start finished in time.
+        """
+        seeds = [None] + list(range(1, runs))
+        config = {
+            "addressClass": type(self.addressImporter),
+            "shared": self.addressImporter.share(),
+            "addressFile": self.addressImporter.file,
+            "packageFile": self.packageFile,
+            "addressCorrections": self.addressCorrections,
+            "numTrucks": self.numTrucks,
+            "startTime": self.startTime,
+            "strategyName": self.strategyName,
+            "partition": self.partition,
+        }
+
+        best = (None, None)
+        stopTime = time.monotonic() + time_limit
+        pool = multiprocessing.Pool(workers, initializer=MultiStart._initWorker, initargs=(config,))
+        results = []
+        try:
+            order = {seed: position for position, seed in enumerate(seeds)}
+            finished = pool.imap_unordered(MultiStart._runWorker, seeds)
+            for _ in seeds:
+                try:
+                    seed, score = finished.next(timeout=max(stopTime - time.monotonic(), 0))
+                except multiprocessing.TimeoutError:
+                    break
+                results.append((score, order[seed], seed))
+        finally:
+            # Stops starts that are still running, instead of waiting for them at exit
+            pool.terminate()
+            pool.join()
+            self.addressImporter.unshare()
+        # Ties go to the earliest start, so the result doesn't depend on finishing order
+        if results:
+            score, _, seed = min(results)
+            best = (seed, score)
+        return best
+
+    @staticmethod
+    def _initWorker(config):
+        """
+        Set up a worker process, attaching to the shared distance matrix.
+
+        Args:
+            config: Settings built by run().
+        """
+        # Coordinate providers share their settings and re-read their small file instead
+        addressImporter = config["addressClass"](config["addressFile"], shared=config["shared"])
+        MultiStart._worker = MultiStart(addressImporter, config["packageFile"], config["addressCorrections"],
+                                        config["numTrucks"], config["startTime"], config["strategyName"], config["partition"])
+
+    @staticmethod
+    def _runWorker(seed):
+        """
+        Run one start in a worker process.
+
+        Args:
+            seed: Seed for randomized package selection, or None.
+
+        Returns:
+            A tuple of (seed, score).
+        """
+        # Warnings are left to the local replay of the best seed, instead of one per start
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            pkgHashTable, trucks, _ = MultiStart._worker.simulate(seed)
+        return seed, MultiStart._worker.score(pkgHashTable, trucks)
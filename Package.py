@@ -1,12 +1,64 @@
-import re
+import sys
+from enum import Enum
 from datetime import datetime, timedelta
 
+from Timeline import Timeline
+
+class PackageState(Enum):
+    """
+    Lifecycle states of a package.
+    """
+    AT_HUB = "At HUB"
+    LOADED = "Loaded"
+    EN_ROUTE = "En route"
+    DELIVERED = "Delivered"
+
+# Canonical (address, city, state, zip_code) tuples, shared by every package with the same address
+_addresses = {}
+
+def internAddress(address, city, state, zip_code):
+    """
+    Get the shared copy of an address tuple, with its strings interned.
+
+    Args:
+        address: Street address.
+        city: City.
+        state: State.
+        zip_code: ZIP code.
+
+    Returns:
+        A tuple of (address, city, state, zip_code) shared with every equal address.
+    """
+    key = (address, city, state, zip_code)
+    if key not in _addresses:
+        _addresses[key] = tuple(sys.intern(x) if isinstance(x, str) else x for x in key)
+    return _addresses[key]
+
 class Package:
     """
     Represents a package in the delivery system.
+
+    The current state, truck and load/delivery times are cached as fields and only changed
+    through transition(). The textual status history is kept for display, while state,
+    truck and address changes are also kept in Timelines for point-in-time queries.
+
+    Packages use __slots__ and share interned status and address values, to keep large
+    manifests small in memory.
     """
+    __slots__ = ("id", "address", "city", "state", "zip_code", "address_id", "address_history",
+                 "deadline", "weight", "status", "current_state", "state_history", "truck_id",
+                 "truck_history", "load_time", "delivery_time", "special_notes", "available_at",
+                 "required_truck", "delivered_with", "corrected_address", "correction_time",
+                 "expected_delivery", "store")
+    # Allowed state transitions, LOADED -> AT_HUB unloads the package
+    TRANSITIONS = {
+        PackageState.AT_HUB: (PackageState.LOADED,),
+        PackageState.LOADED: (PackageState.EN_ROUTE, PackageState.DELIVERED, PackageState.AT_HUB),
+        PackageState.EN_ROUTE: (PackageState.DELIVERED,),
+        PackageState.DELIVERED: (),
+    }
     
-    def __init__(self, id, address, city, state, zip_code, deadline, weight, special_notes="", status="At HUB", status_time=timedelta(hours=7, minutes=00)):
+    def __init__(self, id, address, city, state, zip_code, deadline, weight, special_notes="", status="At HUB", status_time=timedelta(hours=7, minutes=00), address_id=None):
         """
         Initialize a Package object with given attributes.
 
@@ -21,18 +73,31 @@ class Package:
             special_notes: Any addition information about the package. Defaults to blank string.
             status: Current status of the package. Defaults to "At HUB".
             status_time: Current status time. Defaults to 7:00 AM.
+            address_id: Index of the delivery address in the distance matrix. Defaults to None.
         """
         self.id = id
-        self.address = address
-        self.city = city
-        self.state = state
-        self.zip_code = zip_code
-        self.address_history = [[(self.address, self.city, self.state, self.zip_code), status_time]]
+        addressFields = internAddress(address, city, state, zip_code)
+        self.address, self.city, self.state, self.zip_code = addressFields
+        self.address_id = address_id
+        self.address_history = Timeline(status_time, addressFields)
         self.deadline = deadline
         self.weight = weight
-        self.status = [[status,status_time]]
-        self.special_notes = special_notes
+        self.status = [(sys.intern(status), status_time)] # List of (status text, time)
+        self.current_state = PackageState.AT_HUB
+        self.state_history = Timeline(status_time, self.current_state)
+        self.truck_id = None # Truck the package is (or was) loaded on
+        self.truck_history = Timeline(status_time, None) # Truck carrying the package over time, None when not on a truck
+        self.load_time = None
+        self.delivery_time = None
+        self.special_notes = sys.intern(special_notes)
+        # Constraints parsed from the special notes by PackageImporter
+        self.available_at = None # Time the package can be loaded, if delayed or awaiting an address correction
+        self.required_truck = None # Truck ID the package must be on
+        self.delivered_with = () # IDs of packages that must be delivered with this package
+        self.corrected_address = None # Corrected (address, city, state, zip_code), if the listed address is wrong
+        self.correction_time = None # Time the corrected address becomes known
         self.expected_delivery = None
+        self.store = None # PackageStore indexing this package, notified of state changes
     
     def __str__(self, until=None):
         """
@@ -70,14 +135,52 @@ class Package:
     
     def updateStatus(self, status, time=None):
         """
-        Update the status of the package with timestamp.
+        Add a free-text entry to the status history of the package with timestamp.
+
+        This does not change the package's state, use transition() for that.
 
         Args:
-            status: New status of the package.
+            status: Status text to record.
             time: Time of status update
         """
         #if [status, time] not in self.status:
-        self.status.append([status, time])
+        self.status.append((sys.intern(status), time))
+
+    def transition(self, state, time=None, truckID=None):
+        """
+        Move the package to a new lifecycle state and record it in the status history.
+
+        Args:
+            state: The new PackageState.
+            time: Time of the transition.
+            truckID: The truck the package is loaded on, required for PackageState.LOADED.
+
+        Raises:
+            ValueError: If the transition is not allowed from the current state.
+        """
+        if state not in self.TRANSITIONS[self.current_state]:
+            raise ValueError(f"Package {self.id} cannot go from {self.current_state.value} to {state.value}")
+        if state == PackageState.LOADED:
+            if truckID is None:
+                raise ValueError(f"Package {self.id} must be loaded onto a truck")
+            self.truck_id = truckID
+            self.load_time = time
+            self.updateStatus(f"Loaded on truck #{truckID}", time)
+        elif state == PackageState.AT_HUB:
+            self.truck_id = None
+            self.load_time = None
+            self.updateStatus("Unloaded at HUB", time)
+        else:
+            if state == PackageState.DELIVERED:
+                self.delivery_time = time
+            self.updateStatus(state.value, time)
+        self.current_state = state
+        if time is not None:
+            self.state_history.record(time, state)
+            if state != PackageState.EN_ROUTE:
+                self.truck_history.record(time, state == PackageState.LOADED and truckID or None)
+        if self.store is not None:
+            self.store.reindex(self)
     
     def isOnTruck(self, atTime=None):
         """
@@ -87,13 +190,45 @@ class Package:
             Which truck the package is on, False is not loaded (or already delivered, accordin to atTime).
         """
         if atTime:
-            alreadyLoaded = any(["Loaded on truck" in x[0] for x in self.status if x[1] < atTime])
-            whichTruck = [x[0].split('#')[-1] for x in self.status if (x[1] < atTime) and ("Loaded on truck" in x[0])]
-            alreadyDelivered = any(["Delivered" in x[0] for x in self.status if x[1] < atTime])
-            return (alreadyLoaded and not alreadyDelivered) and int(whichTruck[0]) or False
+            return self.truck_history.before(atTime) or False
         
-        whichTruck = [x[0].split('#')[-1] for x in self.status if "Loaded on truck" in x[0]]
-        return any(["Loaded on truck" in x[0] for x in self.status]) and int(whichTruck[0]) or False
+        return self.truck_id or False
+
+    def state_at(self, time):
+        """
+        Get the state of the package at a given time.
+
+        Args:
+            time: The time to look up.
+
+        Returns:
+            The PackageState at that time, PackageState.AT_HUB before any history.
+        """
+        return self.state_history.at(time, PackageState.AT_HUB)
+
+    def truck_at(self, time):
+        """
+        Get the truck carrying the package at a given time.
+
+        Args:
+            time: The time to look up.
+
+        Returns:
+            The truck ID, or None if the package wasn't on a truck at that time.
+        """
+        return self.truck_history.at(time)
+
+    def address_at(self, time):
+        """
+        Get the delivery address of the package at a given time.
+
+        Args:
+            time: The time to look up.
+
+        Returns:
+            A tuple of (address, city, state, zip_code), the listed address before any history.
+        """
+        return self.address_history.at(time, self.address_history.values[0])
 
     def isDelivered(self):
         """
@@ -102,8 +237,7 @@ class Package:
         Returns:
             True if the package is delivered, False otherwise.
         """
-        #return "Delivered" in self.status[-1][0]
-        return any(["Delivered" in x[0] for x in self.status])
+        return self.current_state == PackageState.DELIVERED
     
     def getRequiredTruckID(self):
         """
@@ -112,30 +246,29 @@ class Package:
         Returns:
             The required truck ID, or None if not specified.
         """
-        notes = self.special_notes
-        if "Can only be on truck" in notes:
-            return int(notes.split()[-1])
-        return None
+        return self.required_truck
 
     def getArrivalTime(self):
         """
         Get the arrival time of the package at the depot, if delayed.
 
+        Packages with a wrong address are treated as arriving once the corrected address is known.
+
         Returns:
             The arrival time as a timedelta object, or None if not delayed.
         """
-        notes = self.special_notes
-        # Handle delayed packages
-        if "Delayed on flight---will not arrive to depot until" in notes:
-            time = re.search(r"([0-9]{1,2})\:([0-9]{2})", notes)
-            return timedelta(hours=int(time.group(1)), minutes=int(time.group(2)))
-        # Handle wrong address packages
-        if "Wrong address listed" in notes:
-            # Assume correct addresses are known by 10:20 AM
-            return timedelta(hours=10, minutes=20)
-        return None
+        return self.available_at
 
-    def updateAddress(self, address, city, state, zip_code, time=None):
+    def needsAddressCorrection(self):
+        """
+        Check if the package has a known address correction that hasn't been applied yet.
+
+        Returns:
+            True if the corrected address differs from the current address, False otherwise.
+        """
+        return (self.corrected_address is not None) and (self.corrected_address != (self.address, self.city, self.state, self.zip_code))
+
+    def updateAddress(self, address, city, state, zip_code, time=None, address_id=None):
         """
         Update the address of the package.
 
@@ -144,23 +277,26 @@ class Package:
             city: New city of the package.
             state: New state of the package.
             zip_code: New ZIP code of the package.
+            time: Time of the address update.
+            address_id: Index of the new address in the distance matrix.
         """
-        self.address = address
-        self.city = city
-        self.state = state
-        self.zip_code = zip_code
-        self.status.append(["Delivery address updated", time])
-        self.address_history.append([(self.address, self.city, self.state, self.zip_code), time])
+        addressFields = internAddress(address, city, state, zip_code)
+        self.address, self.city, self.state, self.zip_code = addressFields
+        self.address_id = address_id
+        self.updateStatus("Delivery address updated", time)
+        if time is not None:
+            self.address_history.record(time, addressFields)
     
     def getAddress(self, time=None):
-        if time is None or len(self.address_history) == 1:
-            return ", ".join(map(str, self.address_history[-1][0])) if self.address_history else None
+        """
+        Get the delivery address of the package as a string.
 
-        for i in range(1, len(self.address_history)):
-            previous_entry, previous_time = self.address_history[i - 1]
-            current_entry, current_time = self.address_history[i]
+        Args:
+            time: Get the address in effect at this time. Defaults to None (current address).
 
-            if previous_time <= time < current_time:
-                return ", ".join(map(str, previous_entry))
-        
-        return ", ".join(map(str, self.address_history[-1][0])) if self.address_history else None
+        Returns:
+            The address, city, state and ZIP code joined by commas.
+        """
+        if time is None:
+            return ", ".join(map(str, (self.address, self.city, self.state, self.zip_code)))
+        return ", ".join(map(str, self.address_at(time)))
@@ -1,4 +1,5 @@
-import csv
+import csv, re, time, warnings
+from itertools import islice
 from datetime import timedelta
 
 from Package import Package
@@ -7,16 +8,37 @@ class PackageImporter:
     """
     A class for importing package data from a CSV file and creating Package objects.
     """
-    def __init__(self, file):
+    # Special notes patterns, each note is matched once at import time
+    REQUIRED_TRUCK_PATTERN = re.compile(r"^Can only be on truck (\d+)$", re.IGNORECASE)
+    DELAYED_PATTERN = re.compile(r"^Delayed on flight-+will not arrive to depot until (\d{1,2}):(\d{2})\s*(am|pm)?$", re.IGNORECASE)
+    DELIVERED_WITH_PATTERN = re.compile(r"^Must be delivered with ((?:\d+\s*,?\s*)+)$", re.IGNORECASE)
+    WRONG_ADDRESS_PATTERN = re.compile(r"^Wrong address listed$", re.IGNORECASE)
+    # Assume correct addresses are known by 10:20 AM
+    DEFAULT_CORRECTION_TIME = timedelta(hours=10, minutes=20)
+    # Malformed rows warned about individually, the rest are only counted in the summary warning
+    MAX_ROW_WARNINGS = 10
+
+    def __init__(self, file, addressImporter=None, addressCorrections=None, stream=False):
         """
         Initialize the PackageImporter with the given CSV file and process its contents.
 
         Args:
             file: Path to the CSV file containing package data.
+            addressImporter: AddressImporter used to resolve each package's address index. Defaults to None.
+            addressCorrections: Dict mapping package IDs with a wrong address to a tuple of
+                (time known, (address, city, state, zip_code)). Defaults to None.
+            stream: Don't build the package list, packages are read later with iterPackages()
+                or importInto(). Defaults to False.
         """
         self.file = file
+        self.addressImporter = addressImporter
+        self.addressCorrections = addressCorrections or {}
         self.packages = [] # List to store packages
-        self._import_packages() # Import package data
+        self.unparsed_notes = [] # List of (package ID, special notes) that could not be parsed or resolved
+        self.malformed_rows = [] # List of (line number, error) for rows that could not be imported
+        self.stats = {} # Row counts and throughput of the last import
+        if not stream:
+            self._import_packages() # Import package data
 
     def _import_packages(self):
         """
@@ -25,27 +47,151 @@ class PackageImporter:
         This method reads the CSV file, creates Package objects from each row,
         and appends them to the self.packages list.
         """
-        with open(self.file, 'r') as file:
+        self.packages = list(self.iterPackages())
+
+    def iterPackages(self):
+        """
+        Public method to read the CSV file one row at a time.
+
+        Malformed rows are skipped and recorded in self.malformed_rows with their line number.
+        Warnings are issued once the whole file has been read.
+
+        Returns:
+            A generator of Package objects, in file order.
+        """
+        self.unparsed_notes = []
+        self.malformed_rows = []
+        rows = 0
+        startTime = time.perf_counter()
+        with open(self.file, 'r', newline='') as file:
             csv_reader = csv.reader(file)
             next(csv_reader, None) # Skip the headers
             for row in csv_reader:
-                pkg = Package(
-                    int(row[0]), # PackageID
-                    row[1], # Address
-                    row[2], # City
-                    row[3], # State
-                    int(row[4]), # Zip
-                    'EOD' not in row[5] and timedelta(days=float(row[5])) or None, # DeliveryDeadline
-                    float(row[6]), # WeightKILO
-                    row[7]) # SpecialNotes
-                self.packages.append(pkg)
+                if len(row) == 0:
+                    continue # Skip blank lines
+                rows += 1
+                try:
+                    pkg = self._parse_row(row)
+                except (ValueError, IndexError) as error:
+                    self.malformed_rows.append((csv_reader.line_num, str(error)))
+                    continue
+                self._parse_notes(pkg)
+                yield pkg
+
+        seconds = time.perf_counter() - startTime
+        self.stats = {
+            "rows": rows,
+            "imported": rows - len(self.malformed_rows),
+            "malformed": len(self.malformed_rows),
+            "seconds": seconds,
+            "rows_per_second": seconds and rows / seconds or 0.0,
+        }
+
+        for lineNum, error in self.malformed_rows[:self.MAX_ROW_WARNINGS]:
+            warnings.warn(f"{self.file} line {lineNum}: skipped malformed row ({error})")
+        if len(self.malformed_rows) > self.MAX_ROW_WARNINGS:
+            warnings.warn(f"{self.file}: skipped {len(self.malformed_rows)} malformed rows in total")
+        for pkgID, notes in self.unparsed_notes:
+            warnings.warn(f"Package {pkgID}: could not resolve special notes {notes!r}")
+
+    def importInto(self, store, chunk_size=10000):
+        """
+        Public method to stream packages straight into a store, without building a full list.
+
+        Packages are inserted in chunks of chunk_size, so at most one chunk is held at a time.
+
+        Args:
+            store: The HashTable (or PackageStore) to insert packages into.
+            chunk_size: Number of packages inserted at once. Defaults to 10000.
+
+        Returns:
+            The number of packages imported.
+        """
+        if chunk_size < 1:
+            raise ValueError("chunk_size must be at least 1")
+        packages = self.iterPackages()
+        count = 0
+        while chunk := list(islice(packages, chunk_size)):
+            store.insertMany(chunk)
+            count += len(chunk)
+        return count
+
+    def _parse_row(self, row):
+        """
+        Private method to create a Package from a CSV row.
+
+        Args:
+            row: List of column values.
+
+        Returns:
+            The new Package object.
+
+        Raises:
+            ValueError: If a column has an invalid value, or the address is not in the distance table.
+            IndexError: If the row has too few columns.
+        """
+        if len(row) < 8:
+            raise IndexError(f"expected 8 columns, got {len(row)}")
+        address_id = None
+        if self.addressImporter:
+            try:
+                address_id = self.addressImporter.getAddressIndex(row[1])
+            except KeyError:
+                raise ValueError(f"unknown address {row[1]!r}") from None
+        return Package(
+            int(row[0]), # PackageID
+            row[1], # Address
+            row[2], # City
+            row[3], # State
+            int(row[4]), # Zip
+            'EOD' not in row[5] and timedelta(days=float(row[5])) or None, # DeliveryDeadline
+            float(row[6]), # WeightKILO
+            row[7], # SpecialNotes
+            address_id=address_id)
+
+    def _parse_notes(self, pkg):
+        """
+        Private method to parse a package's special notes into its constraint fields.
+
+        Sets available_at, required_truck, delivered_with, corrected_address and correction_time.
+        Notes that don't match a known pattern are added to self.unparsed_notes.
+
+        Args:
+            pkg: The package to parse the notes of.
+        """
+        notes = pkg.special_notes.strip()
+        if len(notes) == 0:
+            return
+
+        if match := self.REQUIRED_TRUCK_PATTERN.match(notes):
+            pkg.required_truck = int(match.group(1))
+        elif match := self.DELAYED_PATTERN.match(notes):
+            hours = int(match.group(1)) % 12 if match.group(3) else int(match.group(1))
+            if match.group(3) and match.group(3).lower() == "pm":
+                hours += 12
+            pkg.available_at = timedelta(hours=hours, minutes=int(match.group(2)))
+        elif match := self.DELIVERED_WITH_PATTERN.match(notes):
+            pkg.delivered_with = tuple(int(x) for x in match.group(1).replace(',', ' ').split())
+        elif self.WRONG_ADDRESS_PATTERN.match(notes):
+            correction = self.addressCorrections.get(pkg.id)
+            if correction is None:
+                # Still hold the package until corrections are expected, but report it
+                self.unparsed_notes.append((pkg.id, pkg.special_notes))
+                pkg.available_at = self.DEFAULT_CORRECTION_TIME
+                return
+            pkg.correction_time, pkg.corrected_address = correction
+            pkg.correction_time = pkg.correction_time or self.DEFAULT_CORRECTION_TIME
+            # The package can't be loaded until the correct address is known
+            pkg.available_at = pkg.correction_time
+        else:
+            self.unparsed_notes.append((pkg.id, pkg.special_notes))
 
     def getPackages(self):
         """
         Public method to retrieve the list of imported Package objects.
 
         Returns:
-            A list of Package objects created from the CSV data.
+            A list of Package objects created from the CSV data, empty when streaming.
         """
         return self.packages
 
@@ -54,3 +200,5 @@ if __name__ == "__main__":
     importer = PackageImporter('packages.csv')
     for pkg in importer.packages:
         print(pkg)
+    print(f"Imported {importer.stats['imported']} of {importer.stats['rows']} rows, "
+          f"{importer.stats['rows_per_second']:.0f} rows/s")
@@ -0,0 +1,99 @@
+from HashTable import HashTable
+from Package import PackageState
+
+class PackageStore(HashTable):
+    """
+    A package hash table that keeps an index of its packages by lifecycle state.
+
+    The index is updated incrementally whenever a stored package's state changes,
+    so counting the packages in a state doesn't scan the table.
+    """
+    def __init__(self, size=40, load_factor=0.75):
+        """
+        Initialize the package store with an empty index.
+
+        Args:
+            size: The initial size of the hash table. Defaults to 40.
+            load_factor: Maximum average items per bucket before resizing. Defaults to 0.75.
+        """
+        super().__init__(size, load_factor)
+        # Dicts are used as insertion-ordered sets, mapping package ID to package
+        self.by_state = {state: {} for state in PackageState} # state -> packages
+        self._states = {} # Package ID -> state the package is currently filed under
+
+    def insert(self, pkg):
+        """
+        Insert a package into the store and index it.
+
+        If a package with the same ID already exists, it is replaced.
+
+        Args:
+            pkg: The package to be inserted, keyed by its ID.
+        """
+        old = self.lookup(pkg.id)
+        if old is not None:
+            self._unindex(old)
+            old.store = None
+        super().insert(pkg)
+        pkg.store = self
+        self._index(pkg)
+
+    def delete(self, pkgID):
+        """
+        Remove a package from the store and its index.
+
+        Args:
+            pkgID: The ID of the package to remove.
+
+        Returns:
+            The removed package, or None if the ID is not found.
+        """
+        pkg = super().delete(pkgID)
+        if pkg is not None:
+            self._unindex(pkg)
+            pkg.store = None
+        return pkg
+
+    def reindex(self, pkg):
+        """
+        Refile a package after its state changed.
+
+        Called by Package.transition.
+
+        Args:
+            pkg: The package that changed.
+        """
+        if pkg.current_state != self._states[pkg.id]:
+            self._unindex(pkg)
+            self._index(pkg)
+
+    def countByState(self, state):
+        """
+        Count the packages in a lifecycle state.
+
+        Args:
+            state: A PackageState.
+
+        Returns:
+            The number of packages in the state.
+        """
+        return len(self.by_state[state])
+
+    def _index(self, pkg):
+        """
+        File a package under its current state.
+
+        Args:
+            pkg: The package.
+        """
+        self.by_state[pkg.current_state][pkg.id] = pkg
+        self._states[pkg.id] = pkg.current_state
+
+    def _unindex(self, pkg):
+        """
+        Remove a package from the index.
+
+        Args:
+            pkg: The package.
+        """
+        del self.by_state[self._states.pop(pkg.id)][pkg.id]
@@ -0,0 +1,215 @@
+import math
+
+class Cluster:
+    """
+    A geographically compact group of packages that fits on one truck.
+    """
+    __slots__ = ("packages", "medoid", "truck", "deadline")
+
+    def __init__(self, medoid, truck=None):
+        """
+        Initialize an empty Cluster.
+
+        Args:
+            medoid: Address index at the center of the cluster.
+            truck: Truck ID every package in the cluster must be on, or None for any truck. Defaults to None.
+        """
+        self.packages = [] # Packages in the cluster, whole units at a time
+        self.medoid = medoid
+        self.truck = truck
+        self.deadline = None # Earliest deadline in the cluster, None if every package is EOD
+
+    def add(self, unit):
+        """
+        Add a unit of packages to the cluster.
+
+        Args:
+            unit: Tuple of packages loaded together.
+        """
+        self.packages.extend(unit)
+        for pkg in unit:
+            if (pkg.deadline is not None) and ((self.deadline is None) or (pkg.deadline < self.deadline)):
+                self.deadline = pkg.deadline
+
+    def __len__(self):
+        return len(self.packages)
+
+class Partitioner:
+    """
+    Splits the packages waiting at the HUB into truckload-sized, geographically compact clusters.
+
+    Uses capacitated k-medoids on the distance matrix: medoids are seeded farthest-first from
+    the HUB, then units are assigned to their nearest medoid with room left and every medoid
+    is moved to the member address closest to the rest of its cluster, until nothing changes.
+    Units (single packages or whole co-delivery groups) are never split, and a cluster never
+    mixes packages required on different trucks. Each cluster is then loaded and sequenced on
+    its own, so the routing strategy only ever sees one truckload of packages.
+    """
+
+    def __init__(self, addressImporter, capacity, iterations=10):
+        """
+        Initialize a Partitioner with given attributes.
+
+        Args:
+            addressImporter: The AddressImporter holding the distance matrix.
+            capacity: Most packages in a cluster, the smallest truck's capacity.
+            iterations: Most rounds of assigning units and moving medoids. Defaults to 10.
+        """
+        self.addressImporter = addressImporter
+        self.capacity = capacity
+        self.iterations = iterations
+
+    def partition(self, units):
+        """
+        Split units of packages into clusters.
+
+        Args:
+            units: List of tuples of packages loaded together.
+
+        Returns:
+            A list of Clusters. A unit bigger than the capacity gets a cluster of its own.
+        """
+        if not units:
+            return []
+        unitAddresses = [[self._addressOf(pkg) for pkg in unit] for unit in units]
+        unitTrucks = [self._truckOf(unit) for unit in units]
+        count = math.ceil(sum(len(unit) for unit in units) / self.capacity)
+        medoids = self._seed(sorted({address for addresses in unitAddresses for address in addresses}), count)
+
+        clusters = None
+        for _ in range(self.iterations):
+            clusters = self._assign(units, unitAddresses, unitTrucks, medoids)
+            moved = [self._medoidOf(cluster) for cluster in clusters]
+            if moved == [cluster.medoid for cluster in clusters]:
+                break
+            medoids = moved
+        return clusters
+
+    def _addressOf(self, pkg):
+        """
+        Get the address a package will be delivered to.
+
+        Args:
+            pkg: The package.
+
+        Returns:
+            The index of the package's corrected address if it is waiting on one, else of its address.
+        """
+        if pkg.needsAddressCorrection():
+            return self.addressImporter.getAddressIndex(pkg.corrected_address[0])
+        return pkg.address_id
+
+    def _truckOf(self, unit):
+        """
+        Get the truck a unit must be on.
+
+        Args:
+            unit: Tuple of packages loaded together.
+
+        Returns:
+            The required truck ID, or None if any truck can carry the unit.
+        """
+        for pkg in unit:
+            if pkg.required_truck is not None:
+                return pkg.required_truck
+        return None
+
+    def _seed(self, addresses, count):
+        """
+        Choose the starting medoids, each as far as possible from the HUB and the medoids before it.
+
+        Args:
+            addresses: Sorted list of address indexes with packages.
+            count: Number of medoids to choose.
+
+        Returns:
+            A list of address indexes.
+        """
+        closest = self.addressImporter.distances_from(self.addressImporter.hub_index, addresses)
+        medoids = []
+        while len(medoids) < min(count, len(addresses)):
+            # Ties go to the lowest address index, so the result is deterministic
+            position = max(range(len(addresses)), key=lambda position: (closest[position], -position))
+            medoids.append(addresses[position])
+            distances = self.addressImporter.distances_from(addresses[position], addresses)
+            closest = [min(pair) for pair in zip(closest, distances)]
+        return medoids
+
+    def _assign(self, units, unitAddresses, unitTrucks, medoids):
+        """
+        Assign every unit to the nearest medoid whose cluster has room and allows its truck.
+
+        Units with a required truck go first, then units in order of regret, the extra
+        cost of their second nearest medoid, so the units with the most to lose choose first.
+        A unit that fits nowhere joins the nearest cluster started by such a unit before it,
+        or starts a new cluster if none of those has room either.
+
+        Args:
+            units: List of tuples of packages.
+            unitAddresses: List of the address indexes of each unit's packages.
+            unitTrucks: List of the truck ID each unit must be on, or None.
+            medoids: List of address indexes.
+
+        Returns:
+            A list of Clusters, one per medoid (empty ones dropped) followed by any new ones.
+        """
+        # Cost of a unit at a medoid is the distance from the medoid to each of its packages
+        addresses = sorted({address for addressList in unitAddresses for address in addressList})
+        position = {address: i for i, address in enumerate(addresses)}
+        medoidDistances = [self.addressImporter.distances_from(medoid, addresses) for medoid in medoids]
+        # Units at the same addresses share their ranked medoids, most units are a single package
+        ranked = {}
+        costs = []
+        for addressList in unitAddresses:
+            key = tuple(sorted(addressList))
+            if key not in ranked:
+                positions = [position[address] for address in key]
+                if len(positions) == 1:
+                    ranked[key] = sorted((distances[positions[0]], m) for m, distances in enumerate(medoidDistances))
+                else:
+                    ranked[key] = sorted((sum(distances[p] for p in positions), m) for m, distances in enumerate(medoidDistances))
+            costs.append(ranked[key])
+
+        def regret(u):
+            return costs[u][1][0] - costs[u][0][0] if len(costs[u]) > 1 else math.inf
+
+        def allows(cluster, u):
+            fits = (len(cluster) + len(units[u]) <= self.capacity) or (len(cluster) == 0)
+            return fits and ((unitTrucks[u] is None) or (cluster.truck in (None, unitTrucks[u])))
+
+        distance = self.addressImporter.distance_by_index
+        order = sorted(range(len(units)), key=lambda u: (unitTrucks[u] is None, -regret(u), u))
+        clusters = [Cluster(medoid) for medoid in medoids]
+        for u in order:
+            unit = units[u]
+            for _, m in costs[u]:
+                cluster = clusters[m]
+                if allows(cluster, u):
+                    break
+            else:
+                # Clusters started in this pass have no ranked costs, so compare their medoids directly
+                started = [cluster for cluster in clusters[len(medoids):] if allows(cluster, u)]
+                if started:
+                    cluster = min(started, key=lambda cluster: sum(distance(cluster.medoid, address) for address in unitAddresses[u]))
+                else:
+                    cluster = Cluster(unitAddresses[u][0])
+                    clusters.append(cluster)
+            if unitTrucks[u] is not None:
+                cluster.truck = unitTrucks[u]
+            cluster.add(unit)
+        return [cluster for cluster in clusters if len(cluster) > 0]
+
+    def _medoidOf(self, cluster):
+        """
+        Find the member address with the smallest total distance to every package in a cluster.
+
+        Args:
+            cluster: The Cluster.
+
+        Returns:
+            An address index.
+        """
+        addresses = [self._addressOf(pkg) for pkg in cluster.packages]
+        # Ties go to the current medoid, then the lowest index, so assignment settles
+        return min(set(addresses), key=lambda medoid: (sum(self.addressImporter.distances_from(medoid, addresses)),
+                                                       medoid != cluster.medoid, medoid))
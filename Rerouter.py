@@ -0,0 +1,203 @@
+from Package import PackageState
+from Simulator import EventType
+from RouteOptimizer import RouteOptimizer
+from Instrumentation import instrumentation
+
+class Rerouter:
+    """
+    Applies mid-day changes to a delivery day in progress, repairing only the routes they affect.
+
+    Each change runs the simulation up to the change's time, applies it, and leaves the rest
+    of the day to the simulation. Packages still at the HUB are updated in Routing, so the next
+    truck to load them sees the change. For a package on a truck, only that truck's remaining
+    stops are repaired: the package is placed at its cheapest position after the stop the
+    truck is driving to, then the remaining route gets 2-opt and Or-opt moves. A truck always
+    finishes the leg it is on.
+    """
+
+    def __init__(self, simulator, routeOptimizer=None):
+        """
+        Initialize a Rerouter with given attributes.
+
+        Args:
+            simulator: The Simulator running the day, started or not.
+            routeOptimizer: RouteOptimizer used to repair routes. Defaults to the router's, or a new one.
+        """
+        self.simulator = simulator
+        self.router = simulator.router
+        self.pkgHashTable = simulator.pkgHashTable
+        self.addressImporter = simulator.addressImporter
+        self.routeOptimizer = routeOptimizer or self.router.routeOptimizer or RouteOptimizer(self.addressImporter, self.pkgHashTable)
+
+    def advance(self, time):
+        """
+        Run the simulation up to a time.
+
+        Args:
+            time: The time to run to, events at exactly this time are handled.
+
+        Raises:
+            ValueError: If the simulation is already past the time.
+        """
+        if (self.simulator.time is not None) and (time < self.simulator.time):
+            raise ValueError(f"The simulation is already at {self.simulator.time}, past {time}")
+        self.simulator.run(until=time)
+
+    def finish(self):
+        """
+        Run the simulation to the end of the day.
+
+        Returns:
+            The number of events handled.
+        """
+        return self.simulator.run()
+
+    def addPackage(self, pkg, time):
+        """
+        Add a package that arrives at the HUB, for the next truck that loads.
+
+        Args:
+            pkg: The new package, its status history should start at the time.
+            time: Time the package arrives at the HUB.
+
+        Returns:
+            None, since no truck on the road can carry the package.
+        """
+        self.advance(time)
+        with instrumentation.span("reroute", change="add", pkg=pkg.id):
+            self.router.addPackage(pkg, time)
+            # Wake trucks waiting at the HUB once the package is there
+            self.simulator.schedule(max(time, pkg.available_at or time), EventType.RELEASE)
+        return None
+
+    def changeAddress(self, pkgID, address, city, state, zip_code, time):
+        """
+        Change the delivery address of a package that hasn't been delivered.
+
+        Args:
+            pkgID: The package ID.
+            address: New address of the package.
+            city: New city of the package.
+            state: New state of the package.
+            zip_code: New ZIP code of the package.
+            time: Time of the change.
+
+        Raises:
+            ValueError: If the address is not in the distance table, or the package is unknown or already delivered.
+
+        Returns:
+            The ID of the truck whose route was repaired, or None if the package is at the HUB.
+        """
+        # Checked before advancing, so an invalid change leaves the simulation where it was
+        try:
+            self.addressImporter.getAddressIndex(address)
+        except KeyError:
+            raise ValueError(f"Unknown address {address!r}, it is not in the distance table") from None
+        self.advance(time)
+        pkg = self._lookup(pkgID)
+        with instrumentation.span("reroute", change="address", pkg=pkgID):
+            self.router.changeAddress(pkg, address, city, state, zip_code, time)
+            truck = self._truckOf(pkg)
+            if truck is None:
+                return None
+            self._repair(truck, pkg)
+        return truck.id
+
+    def removePackage(self, pkgID, time):
+        """
+        Cancel the delivery of a package that hasn't been delivered.
+
+        The package is dropped from the PackageStore, and from its truck's stops if it is loaded.
+
+        Args:
+            pkgID: The package ID.
+            time: Time of the change.
+
+        Raises:
+            ValueError: If the package is unknown or already delivered.
+
+        Returns:
+            The ID of the truck whose route was repaired, or None if the package was at the HUB.
+        """
+        self.advance(time)
+        pkg = self._lookup(pkgID)
+        with instrumentation.span("reroute", change="remove", pkg=pkgID):
+            truck = self._truckOf(pkg)
+            if truck is not None:
+                truck.packageIDs.remove(pkg.id)
+            self.router.removePackage(pkg)
+            if truck is None:
+                return None
+            self._repair(truck)
+        return truck.id
+
+    def plan(self):
+        """
+        Get the remaining stops of every truck.
+
+        Returns:
+            A dict of truck ID to list of package IDs in delivery order.
+        """
+        return {truck.id: list(truck.packageIDs) for truck in self.simulator.trucks}
+
+    def _lookup(self, pkgID):
+        """
+        Get a package that can still be changed.
+
+        Args:
+            pkgID: The package ID.
+
+        Raises:
+            ValueError: If the package is unknown or already delivered.
+
+        Returns:
+            The package.
+        """
+        pkg = self.pkgHashTable.lookup(pkgID)
+        if pkg is None:
+            raise ValueError(f"Unknown package {pkgID}")
+        if pkg.isDelivered():
+            raise ValueError(f"Package {pkgID} was already delivered")
+        return pkg
+
+    def _truckOf(self, pkg):
+        """
+        Get the truck carrying a package.
+
+        Args:
+            pkg: The package.
+
+        Returns:
+            The Truck, or None if the package is at the HUB.
+        """
+        if pkg.current_state not in (PackageState.LOADED, PackageState.EN_ROUTE):
+            return None
+        return next((truck for truck in self.simulator.trucks if truck.id == pkg.truck_id), None)
+
+    def _repair(self, truck, pkg=None):
+        """
+        Repair the stops a truck has left after the stop it is driving to.
+
+        Args:
+            truck: The truck.
+            pkg: A package on the truck to place again, after its address changed. Defaults to None.
+        """
+        nextStop = self.simulator.nextStops.get(truck.id)
+        if nextStop is None:
+            # Not on the road yet, the route starts where the truck is
+            origin, startTime, heading = self.simulator.locations[truck.id], truck.current_time, None
+        else:
+            startTime, origin, heading = nextStop
+
+        # The package being driven to is still delivered first, unless it was removed or sent elsewhere
+        prefix = []
+        if (heading is not None) and (heading.id in truck.packageIDs) and (heading.address_id == origin):
+            prefix = [heading.id]
+        route = [self.pkgHashTable.lookup(pkgID) for pkgID in truck.packageIDs
+                 if (pkgID not in prefix) and ((pkg is None) or (pkgID != pkg.id))]
+
+        start = (origin, startTime, truck.speed)
+        if (pkg is not None) and (pkg.id not in prefix):
+            route = self.routeOptimizer.insertPackage(route, pkg, start)
+        route = self.routeOptimizer.improve(route, start)
+        truck.packageIDs = prefix + [routePkg.id for routePkg in route]
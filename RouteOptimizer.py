@@ -0,0 +1,232 @@
+import time
+from datetime import timedelta
+
+class RouteOptimizer:
+    """
+    Improves the delivery order of a loaded truck with 2-opt and Or-opt local search.
+
+    Moves are scored with constant-time distance deltas. An improving move is only kept
+    if it doesn't increase the total lateness of the truck's deadline packages.
+    Routing only loads a co-delivery group whole, onto one truck for one trip, and checks
+    this after delivery. Reordering a single truck's route therefore can't split a group.
+    """
+    # Smallest change in miles counted as an improvement, guards against float noise
+    EPSILON = 1e-9
+
+    def __init__(self, addressImporter, pkgHashTable, max_iterations=1000, time_limit=1.0):
+        """
+        Initialize a RouteOptimizer with given attributes.
+
+        Args:
+            addressImporter: The AddressImporter holding the distance matrix.
+            pkgHashTable: The PackageStore containing all packages.
+            max_iterations: Maximum number of improving moves per route. Defaults to 1000.
+            time_limit: Maximum seconds spent per route, or None for no limit. Defaults to 1.0.
+        """
+        self.addressImporter = addressImporter
+        self.pkgHashTable = pkgHashTable
+        self.max_iterations = max_iterations
+        self.time_limit = time_limit
+        self.log = [] # List of (truck ID, miles before, miles after) for every optimized route
+
+    def optimize(self, truck):
+        """
+        Reorder the packages on a truck to shorten its trip from and back to the HUB.
+
+        Args:
+            truck: The truck to optimize, waiting at the HUB.
+
+        Returns:
+            A tuple of (miles before, miles after).
+        """
+        route = [self.pkgHashTable.lookup(pkgID) for pkgID in truck.packageIDs]
+        before = self.routeDistance(route)
+        if len(route) < 2:
+            return before, before
+
+        route = self.improve(route, (self.addressImporter.hub_index, truck.current_time, truck.speed))
+        truck.packageIDs = [pkg.id for pkg in route]
+        after = self.routeDistance(route)
+        self.log.append((truck.id, before, after))
+        return before, after
+
+    def totals(self):
+        """
+        Get the combined mileage of every optimized route.
+
+        Returns:
+            A tuple of (number of routes, miles before, miles after).
+        """
+        return len(self.log), sum(before for _, before, _ in self.log), sum(after for _, _, after in self.log)
+
+    def improve(self, route, start):
+        """
+        Shorten a route from any starting point back to the HUB.
+
+        Args:
+            route: List of packages in delivery order.
+            start: Tuple of (address index the route starts from, time it starts, truck speed).
+
+        Returns:
+            The improved list of packages.
+        """
+        route = list(route)
+        stopTime = self.time_limit is not None and time.perf_counter() + self.time_limit or None
+        lateness = self._lateness(route, start)
+        iterations = 0
+        while (iterations < self.max_iterations) and ((stopTime is None) or (time.perf_counter() < stopTime)):
+            newLateness = self._twoOpt(route, start, lateness)
+            if newLateness is None:
+                newLateness = self._orOpt(route, start, lateness)
+            if newLateness is None:
+                break
+            lateness = newLateness
+            iterations += 1
+        return route
+
+    def insertPackage(self, route, pkg, start):
+        """
+        Insert a package into a route at its cheapest position.
+
+        Positions that make packages later are only used if every position does.
+
+        Args:
+            route: List of packages in delivery order.
+            pkg: The package to insert.
+            start: Tuple of (address index the route starts from, time it starts, truck speed).
+
+        Returns:
+            A new list of packages including the package.
+        """
+        distance = self.addressImporter.distance_by_index
+        stops = self._stops(route, start[0])
+        best = None
+        for position in range(len(route) + 1):
+            before, after = stops[position], stops[position + 1]
+            added = distance(before, pkg.address_id) + distance(pkg.address_id, after) - distance(before, after)
+            candidate = route[:position] + [pkg] + route[position:]
+            key = (self._lateness(candidate, start), added)
+            if (best is None) or (key < best[0]):
+                best = (key, candidate)
+        return best[1]
+
+    def routeDistance(self, route, origin=None):
+        """
+        Get the length of a trip through a list of packages and back to the HUB.
+
+        Args:
+            route: List of packages in delivery order.
+            origin: Address index the trip starts from. Defaults to None (the HUB).
+
+        Returns:
+            The trip length in miles.
+        """
+        distance = self.addressImporter.distance_by_index
+        hub = self.addressImporter.hub_index
+        total = 0.0
+        previous = hub if origin is None else origin
+        for pkg in route:
+            total += distance(previous, pkg.address_id)
+            previous = pkg.address_id
+        return total + distance(previous, hub)
+
+    def _twoOpt(self, route, start, lateness):
+        """
+        Apply the first improving 2-opt move (reversing a segment of the route).
+
+        Args:
+            route: List of packages in delivery order, modified in place.
+            start: Tuple of (origin address index, start time, speed) of the route.
+            lateness: Total lateness of the current route in seconds.
+
+        Returns:
+            The lateness of the new route, or None if no improving move was found.
+        """
+        distance = self.addressImporter.distance_by_index
+        stops = self._stops(route, start[0])
+        for i in range(1, len(stops) - 2):
+            for j in range(i + 1, len(stops) - 1):
+                # Replace edges (i-1, i) and (j, j+1) with (i-1, j) and (i, j+1)
+                delta = distance(stops[i - 1], stops[j]) + distance(stops[i], stops[j + 1]) \
+                    - distance(stops[i - 1], stops[i]) - distance(stops[j], stops[j + 1])
+                if delta < -self.EPSILON:
+                    candidate = route[:i - 1] + route[i - 1:j][::-1] + route[j:]
+                    newLateness = self._lateness(candidate, start)
+                    if newLateness <= lateness:
+                        route[:] = candidate
+                        return newLateness
+        return None
+
+    def _orOpt(self, route, start, lateness):
+        """
+        Apply the first improving Or-opt move (moving a segment of 1 to 3 stops elsewhere).
+
+        Segments of length 1 are plain relocate moves.
+
+        Args:
+            route: List of packages in delivery order, modified in place.
+            start: Tuple of (origin address index, start time, speed) of the route.
+            lateness: Total lateness of the current route in seconds.
+
+        Returns:
+            The lateness of the new route, or None if no improving move was found.
+        """
+        distance = self.addressImporter.distance_by_index
+        stops = self._stops(route, start[0])
+        for length in (1, 2, 3):
+            for i in range(1, len(stops) - length):
+                first, last = stops[i], stops[i + length - 1]
+                # Miles saved by removing the segment and joining its neighbors
+                removeGain = distance(stops[i - 1], first) + distance(last, stops[i + length]) \
+                    - distance(stops[i - 1], stops[i + length])
+                for k in range(len(stops) - 1):
+                    if i - 1 <= k <= i + length - 1:
+                        continue
+                    # Miles added by inserting the segment between stops k and k+1
+                    insertCost = distance(stops[k], first) + distance(last, stops[k + 1]) - distance(stops[k], stops[k + 1])
+                    if insertCost - removeGain < -self.EPSILON:
+                        segment = route[i - 1:i - 1 + length]
+                        rest = route[:i - 1] + route[i - 1 + length:]
+                        position = k if k < i else k - length
+                        candidate = rest[:position] + segment + rest[position:]
+                        newLateness = self._lateness(candidate, start)
+                        if newLateness <= lateness:
+                            route[:] = candidate
+                            return newLateness
+        return None
+
+    def _stops(self, route, origin):
+        """
+        Get the address indexes of a route, starting at its origin and ending at the HUB.
+
+        Args:
+            route: List of packages in delivery order.
+            origin: Address index the route starts from.
+
+        Returns:
+            A list of address indexes.
+        """
+        return [origin] + [pkg.address_id for pkg in route] + [self.addressImporter.hub_index]
+
+    def _lateness(self, route, start):
+        """
+        Get the total time by which packages on a route miss their deadlines.
+
+        Args:
+            route: List of packages in delivery order.
+            start: Tuple of (origin address index, start time, speed) of the route.
+
+        Returns:
+            The total lateness in seconds.
+        """
+        distance = self.addressImporter.distance_by_index
+        previous, startTime, speed = start
+        lateness = 0.0
+        miles = 0.0
+        for pkg in route:
+            miles += distance(previous, pkg.address_id)
+            previous = pkg.address_id
+            if pkg.deadline is not None:
+                arrival = startTime + timedelta(hours=miles / speed)
+                lateness += max((arrival - pkg.deadline).total_seconds(), 0.0)
+        return lateness
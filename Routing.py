@@ -1,4 +1,9 @@
-from datetime import timedelta
+import heapq, warnings
+
+from DisjointSet import DisjointSet
+from Simulator import Simulator
+from Package import PackageState
+from RoutingStrategy import RoutingStrategy, NearestNeighborStrategy
 
 class Routing:
     """
@@ -6,255 +11,373 @@ class Routing:
     Handles special cases such as combined delivery, delays, and wrong addresses.
     """
 
-    def __init__(self, addressImporter, pkgHashTable):
+    def __init__(self, addressImporter, pkgHashTable, routeOptimizer=None, exactSequencer=None, strategy=None, partitioner=None):
         """
         Initialize a Routing object with given attributes.
 
         Args:
-            trucks: Avaiable Trucks to load packages onto
-            pkgHashTable: The hashTable containing all packages.
+            addressImporter: The AddressImporter holding the distance matrix.
+            pkgHashTable: The PackageStore containing all packages.
+            routeOptimizer: RouteOptimizer used to improve each loaded truck's route. Defaults to None.
+            exactSequencer: ExactSequencer used to order small loads optimally. Defaults to None.
+            strategy: RoutingStrategy used to load and order packages. Defaults to a NearestNeighborStrategy.
+            partitioner: Partitioner used to split packages into one cluster per truckload before
+                loading. Defaults to None (trucks load from every package they can carry).
         """
         self.addressImporter = addressImporter
         self.pkgHashTable = pkgHashTable
-        self.pkgDependencies = self._getPackageDependencies()
+        self.routeOptimizer = routeOptimizer
+        self.exactSequencer = exactSequencer
+        self.strategy = strategy or NearestNeighborStrategy(addressImporter, pkgHashTable)
+        self.pkgGroups = self._getPackageDependencies() # Package ID -> group of packages delivered together
+        self.pkgUnits = self._getPackageUnits() # (release time, packages) loaded together
+        self.truckLoadables = {} # Truck ID -> (eligible packages, release queue)
+        self.partitioner = partitioner
+        self.clusters = None # Clusters of the released packages at the HUB, built by the partitioner
+        self.clusteredUnits = 0 # Number of released units when the clusters were built
     
     def deliverPackages(self, trucks):
         """
         Deliver all packages using the available trucks.
 
+        Runs a discrete-event simulation, so the trucks share one clock and
+        load packages in the order they get back to the HUB.
+
         Args:
             trucks: List of Truck objects available for deliveries.
-        """
-        # Loop until all packages are delivered
-        while not self._allPackagesDelivered():
-            # Deliver packages for each truck
-            for truck in trucks:
-                current_address = "HUB"
-
-                # Update status of all packages loaded on truck to "En route"
-                truck.updatePackagesStatus(self.pkgHashTable, "En route")
-
-                # Deliver all packages
-                while len(truck.packageIDs) > 0:
-                    # Get first item in packageID list
-                    # Note: When a package is delivered, it's removed from the list
-                    pkgID = truck.packageIDs[0]
-                    pkg = self.pkgHashTable.lookup(pkgID)
-
-                    # Get the distance between the current address and delivery address
-                    distance = self.addressImporter.distance(current_address, pkg.address)
-
-                    # Delivery the package
-                    truck.deliverPackage(self.pkgHashTable, pkgID, distance)
-
-                    # Update the current address
-                    current_address = pkg.address
-
-                # Return to HUB
-                distance = self.addressImporter.distance(current_address, "HUB")
-                truck.returnToHub(distance)
-            
-            # If any packages remain, load them onto the truck
-            for truck in trucks:
-                self.loadPackagesOntoTruck(truck)
-    
-    def _allPackagesDelivered(self):
-        """
-        Check if all packages in the hash table have been delivered.
 
         Returns:
-            True if all packages are delivered, False otherwise.
+            The Simulator that was run.
         """
-        return all([pkg.isDelivered() for pkg in self.pkgHashTable])
+        simulator = Simulator(self, trucks)
+        simulator.run()
+        self.checkGroups()
+        return simulator
     
     def loadPackagesOntoTruck(self, truck):
         """
         Load packages onto the given truck.
 
+        Co-delivery groups are loaded whole, a group that doesn't fit in the room left waits for another trip.
+
         Args:
             truck: The truck to load packages onto.
         """
         # Load packages until the Truck is at capacity
         loadablePkgs = self._getLoadablePackages(truck)
+        if self.partitioner and loadablePkgs and (truck.current_location == "HUB"):
+            # Only load the truck's cluster, so the strategy works on a single truckload
+            loadablePkgs = self._getClusterPackages(truck, loadablePkgs)
+        loaded = False
+        skipped = [] # Groups set aside for this load because they don't fit in the room left
         while (truck.current_location == "HUB") and (len(loadablePkgs) > 0) and (not truck.isFull()):
-            address = None
-
-            # Set address to HUB if truck is empty
-            if len(truck.packageIDs) == 0:
-                address = "HUB"
-            else:
-                lastPkg = self.pkgHashTable.lookup(truck.packageIDs[-1])
-                address = lastPkg.address
+            # Load the package chosen by the routing strategy
+            nearestPkg, position = self.strategy.selectPackage(truck, loadablePkgs)
+            group = self.group_of(nearestPkg.id)
+            if group and (len(group) > truck.capacity - len(truck.packageIDs)):
+                # The whole group must go together, set it aside until the next trip
+                if len(truck.packageIDs) == 0:
+                    raise ValueError(f"Packages {', '.join(str(pkg.id) for pkg in group)} must be delivered together, "
+                                     f"but don't fit on truck {truck.id}")
+                for pkg in group:
+                    RoutingStrategy.removePackageByAddress(loadablePkgs, pkg)
+                skipped.append(group)
+                continue
 
-            # Load the closest package to the previous address
-            nearestPkg = self._findClosestPackage(address, loadablePkgs)
             truck.loadPackage(self.pkgHashTable, nearestPkg.id)
+            if position is not None:
+                truck.packageIDs.insert(position, truck.packageIDs.pop())
+            self._removeLoadablePackage(nearestPkg, loadablePkgs)
+            loaded = True
 
-            # If package ID is 9, update address
-            # This will only happen when the truck is able to load the package,
-            # after 10:20 AM when the correect address is known
-            if nearestPkg.id == 9:
-                nearestPkg.updateAddress("410 S State St", "Salt Lake City", "UT", 84111, timedelta(hours=10,minutes=20))
-                # Resort, since the route will change due to the new address
-                self._resortTruckPacakges(truck)
-            
             # Check for any dependent packages and load them
-            for subList in self.pkgDependencies:
-                if nearestPkg in subList:
-                    for dependentPkg in subList:
-                        if not dependentPkg.isOnTruck():
-                            truck.loadPackage(self.pkgHashTable, dependentPkg.id)
-                    # Resort, since the dependent packages were not added in a sorted manner
-                    self._resortTruckPacakges(truck)
-            
-            loadablePkgs = self._getLoadablePackages(truck)
+            if group:
+                for dependentPkg in group:
+                    if not dependentPkg.isOnTruck() and truck.loadPackage(self.pkgHashTable, dependentPkg.id):
+                        self._removeLoadablePackage(dependentPkg, loadablePkgs)
+                # Resort, since the dependent packages were not added in a sorted manner
+                self._resortTruckPacakges(truck)
+
+        # Groups set aside stay loadable for later trips
+        for group in skipped:
+            for pkg in group:
+                RoutingStrategy.addPackageByAddress(loadablePkgs, pkg)
+
+        # A load that didn't change keeps its order
+        if loaded and (truck.current_location == "HUB"):
+            # Order the full load exactly, if it is small enough
+            if self.exactSequencer:
+                self._resortTruckPacakges(truck, exact=True)
+            # Improve the route with local search
+            if self.routeOptimizer:
+                self.routeOptimizer.optimize(truck)
     
-    def _resortTruckPacakges(self, truck):
+    def checkGroups(self):
         """
-        Resort packages on the truck based on nearest neighbor algorithm.
+        Check that every co-delivery group was loaded onto one truck on the same trip.
 
-        Args:
-            truck: The truck whose packages need to be resorted.
+        Raises:
+            RuntimeError: If a group was split across trucks or trips.
         """
-        sortedIDs = []
-        current_address = "HUB"
-        packages = [self.pkgHashTable.lookup(id) for id in truck.packageIDs]
-
-        while len(packages) > 0:
-            nnPackage = self._findClosestPackage(current_address, packages)
-            sortedIDs.append(nnPackage.id)
-            current_address = nnPackage.address
-            packages.remove(nnPackage)
-        
-        truck.packageIDs = sortedIDs
-
-    def _findClosestPackage(self, current_address, packages):
+        for pkgID, group in self.pkgGroups.items():
+            # Each group is checked once, by its first member
+            if group[0].id != pkgID:
+                continue
+            loads = {(pkg.truck_id, pkg.load_time) for pkg in group}
+            if len(loads) > 1:
+                raise RuntimeError(f"Packages {', '.join(str(pkg.id) for pkg in group)} must be delivered together, "
+                                   f"but were loaded separately")
+
+    def _resortTruckPacakges(self, truck, exact=False):
         """
-        Find the closest package to the current address.
+        Resort packages on the truck using the routing strategy.
 
         Args:
-            current_address: The current address to compare against.
-            packages: List of packages to search through.
-
-        Returns:
-            The package closest to the current address.
+            truck: The truck whose packages need to be resorted.
+            exact: Use the exact sequencer's optimal order instead, keeping the current heuristic order
+                if it can't solve the load. Only used once loading is finished, since loading continues
+                from the last package. Defaults to False.
         """
+        if exact:
+            result = self.exactSequencer and self.exactSequencer.sequence(truck)
+            if result is not None:
+                truck.packageIDs = result[0]
+            return
 
-        if not packages:
-            return None
-
-        # Uses Python's built-in min function with a key parameter to find the package with the minimum distance.
-        return min(
-            packages,
-            key=lambda pkg: self.addressImporter.distance(pkg.address, current_address)
-        )
+        truck.packageIDs = self.strategy.sequence(truck)
 
     def _getLoadablePackages(self, truck):
         """
         Get all packages that are able to be loaded onto the given truck
 
+        The truck's eligible set is kept between calls. Units whose release time has
+        been reached by the truck's current time are moved into it from the truck's release queue.
+
         Args:
             truck: Truck to load packages onto
         
         Returns:
-            A list of package list that can be loaded onto the truck
+            A dict of address index to dict of packages that can be loaded onto the truck
         """
-        unloadablePkgs = self._getUnloadablePackages(truck)
+        if truck.id not in self.truckLoadables:
+            self.truckLoadables[truck.id] = self._getTruckLoadables(truck)
+        eligible, releaseQueue = self.truckLoadables[truck.id]
+
+        # Release delayed units that have arrived
+        while releaseQueue and releaseQueue[0][0] <= truck.current_time:
+            _, unitIndex = heapq.heappop(releaseQueue)
+            for pkg in self.pkgUnits[unitIndex][1]:
+                if pkg.current_state == PackageState.AT_HUB:
+                    RoutingStrategy.addPackageByAddress(eligible, pkg)
         
-        return [pkg for pkg in self._getUnloadedPackages() if pkg not in unloadablePkgs]
+        return eligible
 
-    def _getUnloadedPackages(self):
+    def _getTruckLoadables(self, truck):
         """
-        Get all packages that are NOT loaded onto a truck
+        Build the eligible set and release queue of a truck.
+
+        Args:
+            truck: Truck to load packages onto
         
         Returns:
-            A list of packages that are NOT loaded onto a truck
+            A tuple of (dict of address index to dict of immediately loadable packages, heap of (release time, unit index))
         """
-        return [pkg for pkg in self.pkgHashTable if not pkg.isOnTruck()]
+        eligible = {}
+        releaseQueue = []
+        for unitIndex, (releaseTime, unit) in enumerate(self.pkgUnits):
+            # Every package in the unit must be allowed on the truck
+            if any((pkg.required_truck is not None) and (pkg.required_truck != truck.id) for pkg in unit):
+                continue
+            if releaseTime is None:
+                for pkg in unit:
+                    if pkg.current_state == PackageState.AT_HUB:
+                        RoutingStrategy.addPackageByAddress(eligible, pkg)
+            else:
+                releaseQueue.append((releaseTime, unitIndex))
+        heapq.heapify(releaseQueue)
+        return eligible, releaseQueue
 
-    def _getUnloadablePackages(self, truck):
+    def _removeLoadablePackage(self, pkg, loadablePkgs=None):
         """
-        Get all packages that are NOT able to be loaded onto the given truck
+        Remove a loaded package from every truck's eligible set.
 
         Args:
-            truck: Truck to load packages onto
-        
+            pkg: The package that was loaded.
+            loadablePkgs: Packages being loaded from, if they are a cluster rather than an eligible set. Defaults to None.
+        """
+        for eligible, _ in self.truckLoadables.values():
+            RoutingStrategy.removePackageByAddress(eligible, pkg)
+        if loadablePkgs is not None:
+            RoutingStrategy.removePackageByAddress(loadablePkgs, pkg)
+
+    def addPackage(self, pkg, time):
+        """
+        Add a package that arrives at the HUB during the day.
+
+        The package is loaded on its own, any "must be delivered with" notes are not resolved.
+
+        Args:
+            pkg: The new package.
+            time: Time the package arrives at the HUB.
+        """
+        if pkg.address_id is None:
+            pkg.address_id = self.addressImporter.getAddressIndex(pkg.address)
+        self.pkgHashTable.insert(pkg)
+        releaseTime = max(time, pkg.available_at or time)
+        self.pkgUnits.append((releaseTime, (pkg,)))
+        # Trucks that haven't loaded yet pick the unit up from pkgUnits when they do
+        for truckID, (_, releaseQueue) in self.truckLoadables.items():
+            if (pkg.required_truck is None) or (pkg.required_truck == truckID):
+                heapq.heappush(releaseQueue, (releaseTime, len(self.pkgUnits) - 1))
+        self.clusters = None
+
+    def changeAddress(self, pkg, address, city, state, zip_code, time):
+        """
+        Change the delivery address of a package.
+
+        A package at the HUB is refiled in the trucks' eligible sets, the route of a truck carrying
+        the package is left to the caller. Supersedes any pending address correction of the package.
+
+        Args:
+            pkg: The package.
+            address: New address of the package.
+            city: New city of the package.
+            state: New state of the package.
+            zip_code: New ZIP code of the package.
+            time: Time of the change.
+        """
+        # Eligible sets are keyed by address, so the package is refiled under its new one
+        holders = [eligible for eligible, _ in self.truckLoadables.values() if pkg.id in eligible.get(pkg.address_id, ())]
+        for eligible in holders:
+            RoutingStrategy.removePackageByAddress(eligible, pkg)
+        pkg.updateAddress(address, city, state, zip_code, time, self.addressImporter.getAddressIndex(address))
+        pkg.corrected_address = None
+        for eligible in holders:
+            RoutingStrategy.addPackageByAddress(eligible, pkg)
+        self.clusters = None
+
+    def removePackage(self, pkg):
+        """
+        Remove a package from the day's deliveries.
+
+        The package is dropped from the PackageStore, its loading unit and its co-delivery group.
+        A loaded package must be taken off its truck by the caller first.
+
+        Args:
+            pkg: The package.
+        """
+        self._removeLoadablePackage(pkg)
+        for unitIndex, (releaseTime, unit) in enumerate(self.pkgUnits):
+            if pkg in unit:
+                # Units are referenced by index from the release queues, so the entry is kept
+                self.pkgUnits[unitIndex] = (releaseTime, tuple(member for member in unit if member is not pkg))
+                break
+        group = self.pkgGroups.pop(pkg.id, None)
+        if group:
+            group = tuple(member for member in group if member is not pkg)
+            for member in group:
+                if len(group) > 1:
+                    self.pkgGroups[member.id] = group
+                else:
+                    del self.pkgGroups[member.id]
+        self.pkgHashTable.delete(pkg.id)
+        self.clusters = None
+
+    def _getClusterPackages(self, truck, eligible):
+        """
+        Choose the cluster a truck loads next.
+
+        The released units still at the HUB are partitioned again whenever more units have been
+        released, otherwise the clusters from the last partition are reused. The truck takes the
+        cluster with the earliest deadline that it can carry whole, preferring clusters bound to
+        it, then the one closest to the HUB.
+
+        Args:
+            truck: The truck being loaded, at the HUB.
+            eligible: Dict of address index to dict of packages the truck can load.
+
         Returns:
-            A list of package list that can NOT be loaded onto the truck
+            A dict of address index to dict of the cluster's packages still at the HUB, or the
+            whole eligible set if no cluster can go on the truck.
         """
-        unloadablePkgs = []
-        
-        for pkg in self.pkgHashTable:
-            # If the package is already loaded onto a truck, add it to the list
-            if pkg.isOnTruck():
-                unloadablePkgs.append(pkg)
-            
-            # Handle delayed packages
-            elif (pkg.getRequiredTruckID() is not None) and (pkg.getRequiredTruckID() != truck.id):
-                if pkg not in unloadablePkgs:
-                    unloadablePkgs.append(pkg)
-            
-            # Handle packages that need to be on a specific truck
-            elif (pkg.getArrivalTime() is not None) and (pkg.getArrivalTime() >= truck.current_time):
-                unloadablePkgs.append(pkg)
-
-                # Make sure any dependent packages are unloadable aswell
-                for subList in self.pkgDependencies:
-                    # Does the package have an dependencies?
-                    if pkg in subList:
-                        # Add all of them to the unloadable list if they aren't already
-                        for dependentPkg in subList:
-                            if dependentPkg not in unloadablePkgs:
-                                unloadablePkgs.append(dependentPkg)
-        
-        return unloadablePkgs
-    
-    def _getPackageDependencies(self):
+        released = [unit for releaseTime, unit in self.pkgUnits if (releaseTime is None) or (releaseTime <= truck.current_time)]
+        if (self.clusters is None) or (len(released) != self.clusteredUnits):
+            waiting = [unit for unit in released if all(pkg.current_state == PackageState.AT_HUB for pkg in unit)]
+            self.clusters = self.partitioner.partition(waiting)
+            self.clusteredUnits = len(released)
+
+        # Forget packages loaded since the partition, and clusters with none left
+        for cluster in self.clusters:
+            cluster.packages = [pkg for pkg in cluster.packages if pkg.current_state == PackageState.AT_HUB]
+        self.clusters = [cluster for cluster in self.clusters if cluster.packages]
+
+        hub = self.addressImporter.hub_index
+        room = truck.capacity - len(truck.packageIDs)
+        candidates = [cluster for cluster in self.clusters if (len(cluster) <= room)
+                      and all(pkg.id in eligible.get(pkg.address_id, ()) for pkg in cluster.packages)]
+        if not candidates:
+            return eligible
+        cluster = min(candidates, key=lambda cluster: (cluster.deadline is None, cluster.deadline, cluster.truck != truck.id,
+                                                       self.addressImporter.distance_by_index(hub, cluster.medoid)))
+        clusterPkgs = {}
+        for pkg in cluster.packages:
+            RoutingStrategy.addPackageByAddress(clusterPkgs, pkg)
+        return clusterPkgs
+
+    def _getPackageUnits(self):
         """
-        Get list of all packages that must be delivered together.
+        Split all packages into units that are released and loaded together.
+
+        A unit is either a single package or a whole dependency group. A unit is
+        released once every package in it has arrived at the HUB.
 
         Returns:
-            A list of package lists that must be delivered together.
+            A list of (release time or None, tuple of packages).
         """
-        masterList = []
+        units = []
         for pkg in self.pkgHashTable:
-            if pkg and "Must be delivered with" in pkg.special_notes:
-                pkgDependencies = self._getPackageSubDependencies(pkg)
-                self._updateMasterList(masterList, pkgDependencies)
-        return masterList
-
-    def _getPackageSubDependencies(self, package):
+            group = self.group_of(pkg.id)
+            if group and group[0] is not pkg:
+                # Groups are added once, by their first member
+                continue
+            unit = group or (pkg,)
+            arrivalTimes = [member.available_at for member in unit if member.available_at is not None]
+            units.append((max(arrivalTimes, default=None), unit))
+        return units
+    
+    def group_of(self, pkgID):
         """
-        Parse package's special notes and get a list of directly related packages.
+        Get the group of packages that must be delivered together with a package.
 
         Args:
-            package: The initial package.
+            pkgID: The package ID.
 
         Returns:
-            A list of packages that must be delivered with the initial package.
+            A tuple of packages (including the package itself), or None if the package has no dependencies.
         """
-        notes = package.special_notes
-        if "Must be delivered with" in notes:
-            pkgDependencies = [package]
-            IDs = [int(x) for x in notes.replace(',', ' ').split() if x.isdigit()]
-            for pkgID in IDs:
-                pkg = self.pkgHashTable.lookup(pkgID)
-                pkgDependencies.append(pkg)
-                additionalPkgs = self._getPackageSubDependencies(pkg)
-                if additionalPkgs is not None:
-                    pkgDependencies.extend(additionalPkgs)
-            return pkgDependencies
-
-    def _updateMasterList(self, masterList, pkgDependencies):
+        return self.pkgGroups.get(pkgID)
+
+    def _getPackageDependencies(self):
         """
-        Update the master list of package dependencies.
+        Resolve all "must be delivered with" constraints into groups of packages.
 
-        Args:
-            masterList: The current master list of package dependencies.
-            pkgDependencies: New package dependencies to be added or merged.
+        Constraints are merged with a disjoint-set, so chains and cycles of
+        dependencies are handled in a single linear pass.
+
+        Returns:
+            A dict mapping each dependent package's ID to its group, a tuple of packages ordered by ID.
         """
-        combineList = next((subList for subList in masterList if any(dep in subList for dep in pkgDependencies)), None)
-        if combineList:
-            combineList.extend([dep for dep in pkgDependencies if dep not in combineList])
-        else:
-            masterList.append(pkgDependencies)
+        dependencies = DisjointSet()
+        for pkg in self.pkgHashTable:
+            for pkgID in pkg.delivered_with:
+                if pkgID in self.pkgHashTable:
+                    dependencies.union(pkg.id, pkgID)
+                else:
+                    warnings.warn(f"Package {pkg.id} must be delivered with unknown package {pkgID}")
+
+        pkgGroups = {}
+        for pkgIDs in dependencies.groups():
+            group = tuple(self.pkgHashTable.lookup(pkgID) for pkgID in sorted(pkgIDs))
+            for pkg in group:
+                pkgGroups[pkg.id] = group
+        return pkgGroups
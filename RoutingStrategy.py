@@ -0,0 +1,502 @@
+import math
+
+class RoutingStrategy:
+    """
+    Base class for the algorithms Routing uses to choose and order packages.
+
+    A strategy provides the two hooks Routing calls: selectPackage, to pick the next
+    package to load onto a truck, and sequence, to order the packages already on a truck.
+    Loadable packages are passed in as a dict of address index to dict of package ID to package.
+
+    Given a random number generator, selectPackage picks randomly among the best few
+    candidates instead of always taking the best, for randomized multi-start construction.
+    """
+    # Name used to select the strategy, e.g. from main.py
+    name = None
+
+    def __init__(self, addressImporter, pkgHashTable, rng=None, choices=3):
+        """
+        Initialize a RoutingStrategy with given attributes.
+
+        Args:
+            addressImporter: The AddressImporter holding the distance matrix.
+            pkgHashTable: The PackageStore containing all packages.
+            rng: random.Random used to randomize package selection. Defaults to None (deterministic).
+            choices: Number of best candidates to pick from when randomized. Defaults to 3.
+        """
+        self.addressImporter = addressImporter
+        self.pkgHashTable = pkgHashTable
+        self.rng = rng
+        self.choices = choices
+
+    def selectPackage(self, truck, loadablePkgs):
+        """
+        Choose the next package to load onto a truck.
+
+        Args:
+            truck: The truck being loaded.
+            loadablePkgs: Dict of address index to dict of packages that can be loaded.
+
+        Returns:
+            A tuple of (package, position in truck.packageIDs to insert it at, or None to append it).
+        """
+        raise NotImplementedError
+
+    def sequence(self, truck):
+        """
+        Order the packages on a truck.
+
+        Args:
+            truck: The truck to order the packages of.
+
+        Returns:
+            A list of package IDs in delivery order.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def addPackageByAddress(packages, pkg):
+        """
+        Add a package to a dict of packages grouped by address.
+
+        Args:
+            packages: Dict of address index to dict of package ID to package.
+            pkg: The package to add.
+        """
+        packages.setdefault(pkg.address_id, {})[pkg.id] = pkg
+
+    @staticmethod
+    def removePackageByAddress(packages, pkg):
+        """
+        Remove a package from a dict of packages grouped by address.
+
+        Addresses left without packages are removed, so only addresses with packages remain.
+
+        Args:
+            packages: Dict of address index to dict of package ID to package.
+            pkg: The package to remove.
+        """
+        addressPkgs = packages.get(pkg.address_id)
+        if addressPkgs is not None:
+            addressPkgs.pop(pkg.id, None)
+            if len(addressPkgs) == 0:
+                del packages[pkg.address_id]
+
+    def _pick(self, ranked):
+        """
+        Pick a candidate from a list ranked best first.
+
+        Args:
+            ranked: List of candidates, best first.
+
+        Returns:
+            The best candidate, or a random one of the best few if randomized.
+        """
+        if (self.rng is None) or (len(ranked) == 1):
+            return ranked[0]
+        return self.rng.choice(ranked[:self.choices])
+
+    def _getRoute(self, truck):
+        """
+        Get the packages on a truck in their current order.
+
+        Args:
+            truck: The truck.
+
+        Returns:
+            A list of packages.
+        """
+        return [self.pkgHashTable.lookup(pkgID) for pkgID in truck.packageIDs]
+
+    def _getLimit(self, pkg, truck):
+        """
+        Get the most miles the truck can drive from the HUB before delivering a package on time.
+
+        Args:
+            pkg: The package.
+            truck: The truck, leaving the HUB at its current time.
+
+        Returns:
+            The mileage limit, or infinity for EOD packages.
+        """
+        if pkg.deadline is None:
+            return math.inf
+        return (pkg.deadline - truck.current_time).total_seconds() / 3600 * truck.speed
+
+    def _byDeadline(self, loadablePkgs):
+        """
+        Split loadable packages into the ones with a deadline and the rest.
+
+        Args:
+            loadablePkgs: Dict of address index to dict of packages.
+
+        Returns:
+            A list with a list of deadline packages (if any), followed by a list of EOD packages (if any).
+        """
+        deadlinePkgs, eodPkgs = [], []
+        for addressPkgs in loadablePkgs.values():
+            for pkg in addressPkgs.values():
+                (deadlinePkgs if pkg.deadline is not None else eodPkgs).append(pkg)
+        return [tier for tier in (deadlinePkgs, eodPkgs) if tier]
+
+
+class NearestNeighborStrategy(RoutingStrategy):
+    """
+    Loads and orders packages by always going to the closest remaining address.
+    """
+    name = "nearest"
+
+    def selectPackage(self, truck, loadablePkgs):
+        """
+        Choose the loadable package closest to the last package on the truck (or the HUB).
+
+        Args:
+            truck: The truck being loaded.
+            loadablePkgs: Dict of address index to dict of packages that can be loaded.
+
+        Returns:
+            A tuple of (package, None), the package is appended.
+        """
+        # Set address to HUB if truck is empty
+        if len(truck.packageIDs) == 0:
+            addressIndex = self.addressImporter.hub_index
+        else:
+            addressIndex = self.pkgHashTable.lookup(truck.packageIDs[-1]).address_id
+        if self.rng is None:
+            return self._findClosestPackage(addressIndex, loadablePkgs), None
+
+        # Collect the closest few addresses with loadable packages and pick one
+        addresses = []
+        for address in self.addressImporter.neighbors(addressIndex):
+            if address in loadablePkgs:
+                addresses.append(address)
+                if len(addresses) == self.choices:
+                    break
+        return next(iter(loadablePkgs[self._pick(addresses)].values())), None
+
+    def sequence(self, truck):
+        """
+        Order the packages on a truck based on nearest neighbor algorithm.
+
+        Args:
+            truck: The truck to order the packages of.
+
+        Returns:
+            A list of package IDs in delivery order.
+        """
+        sortedIDs = []
+        current_index = self.addressImporter.hub_index
+        packages = {}
+        for pkg in self._getRoute(truck):
+            self.addPackageByAddress(packages, pkg)
+
+        while len(packages) > 0:
+            nnPackage = self._findClosestPackage(current_index, packages)
+            sortedIDs.append(nnPackage.id)
+            current_index = nnPackage.address_id
+            self.removePackageByAddress(packages, nnPackage)
+        return sortedIDs
+
+    def _findClosestPackage(self, current_index, packages):
+        """
+        Find the closest package to the current address.
+
+        Args:
+            current_index: Index of the current address to compare against.
+            packages: Dict of address index to dict of packages to search through.
+
+        Returns:
+            The package closest to the current address.
+        """
+        if not packages:
+            return None
+
+        # Walk the current address's precomputed neighbor list until an address with a package is found
+        address = self.addressImporter.nearest(current_index, packages)
+        return next(iter(packages[address].values()))
+
+
+class InsertionStrategy(RoutingStrategy):
+    """
+    Base class for insertion heuristics with time windows.
+
+    Every candidate package is scored at every position of the truck's current route.
+    A position is feasible if the package and every package after it still meet their
+    deadlines, checked in constant time from the route's forward slack. Deadline packages
+    are considered before EOD packages, so they go out on the earliest possible trip.
+    """
+
+    def selectPackage(self, truck, loadablePkgs):
+        """
+        Choose the next package to load and where to insert it in the truck's route.
+
+        Args:
+            truck: The truck being loaded.
+            loadablePkgs: Dict of address index to dict of packages that can be loaded.
+
+        Returns:
+            A tuple of (package, position in truck.packageIDs to insert it at).
+        """
+        route = self._getRoute(truck)
+        stops, miles, slack = self._getRouteSlack(route, truck)
+        for candidates in self._byDeadline(loadablePkgs):
+            choice = self._choose(candidates, stops, miles, slack, truck)
+            if choice is not None:
+                return choice
+
+        # Nothing fits without making a package late, fall back to the cheapest insertion overall
+        candidates = [pkg for addressPkgs in loadablePkgs.values() for pkg in addressPkgs.values()]
+        return self._choose(candidates, stops, miles, [math.inf] * len(stops), truck, ignoreLimits=True)
+
+    def sequence(self, truck):
+        """
+        Order the packages on a truck by inserting them one at a time into an empty route.
+
+        Args:
+            truck: The truck to order the packages of.
+
+        Returns:
+            A list of package IDs in delivery order.
+        """
+        remaining = {}
+        for pkg in self._getRoute(truck):
+            self.addPackageByAddress(remaining, pkg)
+
+        route = []
+        while len(remaining) > 0:
+            stops, miles, slack = self._getRouteSlack(route, truck)
+            candidates = [pkg for addressPkgs in remaining.values() for pkg in addressPkgs.values()]
+            choice = self._choose(candidates, stops, miles, slack, truck)
+            if choice is None:
+                choice = self._choose(candidates, stops, miles, [math.inf] * len(stops), truck, ignoreLimits=True)
+            pkg, position = choice
+            route.insert(position, pkg)
+            self.removePackageByAddress(remaining, pkg)
+        return [pkg.id for pkg in route]
+
+    def _choose(self, candidates, stops, miles, slack, truck, ignoreLimits=False):
+        """
+        Choose a package and insertion position from the candidates.
+
+        Args:
+            candidates: List of packages.
+            stops: Address indexes of the route, starting and ending at the HUB.
+            miles: Miles driven on arrival at each stop.
+            slack: Miles each stop (and every stop after it) can be delayed by.
+            truck: The truck the route belongs to.
+            ignoreLimits: Ignore the candidate's own deadline. Defaults to False.
+
+        Returns:
+            A tuple of (package, position), or None if no candidate has a feasible position.
+        """
+        raise NotImplementedError
+
+    def _getInsertions(self, pkg, stops, miles, slack, truck, ignoreLimits=False):
+        """
+        Get the cost of every feasible position for a package in a route.
+
+        Args:
+            pkg: The package to insert.
+            stops: Address indexes of the route, starting and ending at the HUB.
+            miles: Miles driven on arrival at each stop.
+            slack: Miles each stop (and every stop after it) can be delayed by.
+            truck: The truck the route belongs to.
+            ignoreLimits: Ignore the package's own deadline. Defaults to False.
+
+        Returns:
+            A list of (added miles, position) sorted by added miles.
+        """
+        distance = self.addressImporter.distance_by_index
+        limit = math.inf if ignoreLimits else self._getLimit(pkg, truck)
+        insertions = []
+        for position in range(len(stops) - 1):
+            before, after = stops[position], stops[position + 1]
+            toPkg = distance(before, pkg.address_id)
+            added = toPkg + distance(pkg.address_id, after) - distance(before, after)
+            if (miles[position] + toPkg <= limit) and (added <= slack[position + 1]):
+                insertions.append((added, position))
+        insertions.sort()
+        return insertions
+
+    def _getRouteSlack(self, route, truck):
+        """
+        Get the stops, arrival mileage and forward slack of a route.
+
+        Args:
+            route: List of packages in delivery order.
+            truck: The truck the route belongs to.
+
+        Returns:
+            A tuple of (stops, miles, slack), indexed by stop (0 and -1 are the HUB).
+        """
+        distance = self.addressImporter.distance_by_index
+        hub = self.addressImporter.hub_index
+        stops = [hub] + [pkg.address_id for pkg in route] + [hub]
+        miles = [0.0]
+        for position in range(1, len(stops)):
+            miles.append(miles[-1] + distance(stops[position - 1], stops[position]))
+
+        slack = [math.inf] * len(stops)
+        for position in range(len(route), 0, -1):
+            slack[position] = min(slack[position + 1], self._getLimit(route[position - 1], truck) - miles[position])
+        return stops, miles, slack
+
+
+class CheapestInsertionStrategy(InsertionStrategy):
+    """
+    Inserts the package that adds the fewest miles at its best feasible position.
+    """
+    name = "cheapest"
+
+    def _choose(self, candidates, stops, miles, slack, truck, ignoreLimits=False):
+        """
+        Choose the candidate with the cheapest feasible insertion.
+
+        Args:
+            candidates: List of packages.
+            stops: Address indexes of the route, starting and ending at the HUB.
+            miles: Miles driven on arrival at each stop.
+            slack: Miles each stop (and every stop after it) can be delayed by.
+            truck: The truck the route belongs to.
+            ignoreLimits: Ignore the candidate's own deadline. Defaults to False.
+
+        Returns:
+            A tuple of (package, position), or None if no candidate has a feasible position.
+        """
+        ranked = []
+        for pkg in candidates:
+            insertions = self._getInsertions(pkg, stops, miles, slack, truck, ignoreLimits)
+            if insertions:
+                ranked.append((insertions[0][0], pkg, insertions[0][1]))
+        if not ranked:
+            return None
+        ranked.sort(key=lambda choice: choice[0])
+        _, pkg, position = self._pick(ranked)
+        return pkg, position
+
+
+class RegretInsertionStrategy(InsertionStrategy):
+    """
+    Inserts the package that would lose the most by not going on the trip being loaded.
+
+    A package can go on the trip being loaded or on a later trip. The regret of a package is
+    the cost of a trip of its own from the HUB, the most a later trip can add, minus the cost
+    of its best feasible position now. Far packages that fit cheaply into the trip go first,
+    and cheap nearby ones are left for trips that pass them anyway. Deadlines are only
+    checked within the trip being loaded, so like every strategy it can't make up for trucks
+    that return too late for packages released during the day.
+    """
+    name = "regret"
+
+    def _choose(self, candidates, stops, miles, slack, truck, ignoreLimits=False):
+        """
+        Choose the candidate that saves the most over a trip of its own by going on this trip.
+
+        Ties go to the cheaper insertion.
+
+        Args:
+            candidates: List of packages.
+            stops: Address indexes of the route, starting and ending at the HUB.
+            miles: Miles driven on arrival at each stop.
+            slack: Miles each stop (and every stop after it) can be delayed by.
+            truck: The truck the route belongs to.
+            ignoreLimits: Ignore the candidate's own deadline. Defaults to False.
+
+        Returns:
+            A tuple of (package, position), or None if no candidate has a feasible position.
+        """
+        distance = self.addressImporter.distance_by_index
+        hub = self.addressImporter.hub_index
+        ranked = []
+        for pkg in candidates:
+            insertions = self._getInsertions(pkg, stops, miles, slack, truck, ignoreLimits)
+            if not insertions:
+                continue
+            alone = distance(hub, pkg.address_id) + distance(pkg.address_id, hub)
+            regret = alone - insertions[0][0]
+            ranked.append(((-regret, insertions[0][0]), pkg, insertions[0][1]))
+        if not ranked:
+            return None
+        ranked.sort(key=lambda choice: choice[0])
+        _, pkg, position = self._pick(ranked)
+        return pkg, position
+
+
+class SavingsStrategy(RoutingStrategy):
+    """
+    Clarke-Wright savings: joins the stops whose shared trip saves the most miles over separate trips.
+
+    Deadline packages are loaded first, but neither loading nor sequencing checks the deadlines
+    themselves. Loads small enough for the exact sequencer still get a deadline-feasible order,
+    larger ones can deliver packages late.
+    """
+    name = "savings"
+
+    def selectPackage(self, truck, loadablePkgs):
+        """
+        Choose the package with the largest savings when visited right after the truck's last package.
+
+        From an empty truck this picks the package farthest from the HUB. Deadline packages are considered first.
+
+        Args:
+            truck: The truck being loaded.
+            loadablePkgs: Dict of address index to dict of packages that can be loaded.
+
+        Returns:
+            A tuple of (package, None), the package is appended.
+        """
+        distance = self.addressImporter.distance_by_index
+        hub = self.addressImporter.hub_index
+        candidates = self._byDeadline(loadablePkgs)[0]
+        if len(truck.packageIDs) == 0:
+            # Every package saves nothing from the HUB, so start the trip at the farthest one
+            ranked = sorted(candidates, key=lambda pkg: -distance(hub, pkg.address_id))
+        else:
+            last = self.pkgHashTable.lookup(truck.packageIDs[-1]).address_id
+            ranked = sorted(candidates, key=lambda pkg: distance(last, pkg.address_id) - distance(hub, last) - distance(hub, pkg.address_id))
+        return self._pick(ranked), None
+
+    def sequence(self, truck):
+        """
+        Order the packages on a truck by merging single-stop trips in order of savings.
+
+        Args:
+            truck: The truck to order the packages of.
+
+        Returns:
+            A list of package IDs in delivery order.
+        """
+        distance = self.addressImporter.distance_by_index
+        hub = self.addressImporter.hub_index
+        stopPkgs = {}
+        for pkg in self._getRoute(truck):
+            stopPkgs.setdefault(pkg.address_id, []).append(pkg.id)
+        stops = list(stopPkgs)
+
+        savings = sorted(
+            ((distance(hub, i) + distance(hub, j) - distance(i, j), i, j) for x, i in enumerate(stops) for j in stops[x + 1:]),
+            reverse=True
+        )
+        # Each stop starts as its own trip, trips are merged end to end
+        paths = {stop: [stop] for stop in stops} # End stop -> path it ends
+        for _, i, j in savings:
+            pathI, pathJ = paths.get(i), paths.get(j)
+            if (pathI is None) or (pathJ is None) or (pathI is pathJ):
+                continue
+            # Orient the paths so i is the tail of one and j the head of the other
+            if pathI[-1] != i:
+                pathI.reverse()
+            if pathJ[0] != j:
+                pathJ.reverse()
+            merged = pathI + pathJ
+            for end in (pathI[0], pathI[-1], pathJ[0], pathJ[-1]):
+                paths.pop(end, None)
+            paths[merged[0]] = merged
+            paths[merged[-1]] = merged
+
+        order = next(iter(paths.values()), [])
+        return [pkgID for stop in order for pkgID in stopPkgs[stop]]
+
+
+# Strategies available by name
+STRATEGIES = {strategy.name: strategy for strategy in (NearestNeighborStrategy, CheapestInsertionStrategy, RegretInsertionStrategy, SavingsStrategy)}
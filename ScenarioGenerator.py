@@ -0,0 +1,191 @@
+import csv, json, math, os, random
+from datetime import timedelta
+
+from AddressImporter import AddressImporter
+
+class ScenarioGenerator:
+    """
+    Generates synthetic delivery scenarios in the same file formats as distances.csv and packages.csv.
+
+    Addresses are random points in a square, and distances are the straight-line distances
+    between them, so the matrix is a true metric. Special notes use the same wording as the
+    shipped manifest, so every note is parsed the same way. The same seed always produces
+    the same files.
+    """
+    # Deadlines handed out to packages that have one, as in the shipped manifest
+    DEADLINES = (timedelta(hours=9, minutes=0), timedelta(hours=10, minutes=30))
+    # Time delayed packages arrive at the HUB
+    DELAY_TIME = timedelta(hours=9, minutes=5)
+    STREETS = ("Main St", "State St", "Canyon Rd", "Parkway Blvd", "Lester St", "Oakland Ave",
+               "Price Ave", "Dalton Ave", "Taylorsville Blvd", "Lake Dr")
+
+    def __init__(self, addresses=27, packages=40, trucks=2, seed=0, area=12.0, deadline_share=0.35,
+                 delayed_share=0.1, truck_only_share=0.1, group_share=0.1, max_group_size=4):
+        """
+        Initialize a ScenarioGenerator with given attributes.
+
+        Args:
+            addresses: Number of addresses, including the HUB. Defaults to 27.
+            packages: Number of packages. Defaults to 40.
+            trucks: Number of trucks, truck-only notes name one of these. Defaults to 2.
+            seed: Random seed. Defaults to 0.
+            area: Side of the square the addresses are spread over, in miles. Defaults to 12.0.
+            deadline_share: Share of packages with a deadline. Defaults to 0.35.
+            delayed_share: Share of packages delayed until 9:05 AM. Defaults to 0.1.
+            truck_only_share: Share of packages that can only be on one truck. Defaults to 0.1.
+            group_share: Share of packages in co-delivery groups. Defaults to 0.1.
+            max_group_size: Largest co-delivery group. Defaults to 4.
+        """
+        if addresses < 2:
+            raise ValueError("addresses must be at least 2")
+        if delayed_share + truck_only_share + group_share > 1:
+            raise ValueError("delayed_share, truck_only_share and group_share must add up to at most 1")
+        self.addresses = addresses
+        self.packages = packages
+        self.trucks = trucks
+        self.seed = seed
+        self.area = area
+        self.deadline_share = deadline_share
+        self.delayed_share = delayed_share
+        self.truck_only_share = truck_only_share
+        self.group_share = group_share
+        self.max_group_size = max(2, max_group_size)
+
+    def write(self, directory):
+        """
+        Write the scenario files into a directory.
+
+        Args:
+            directory: Directory to write distances.csv, coordinates.csv, packages.csv and
+                scenario.json into, created if missing.
+
+        Returns:
+            A dict with the paths of the files written and the scenario settings.
+        """
+        os.makedirs(directory, exist_ok=True)
+        rng = random.Random(self.seed)
+        places = self._generatePlaces(rng)
+
+        distanceFile = os.path.join(directory, "distances.csv")
+        with open(distanceFile, "w", newline="") as file:
+            writer = csv.writer(file)
+            for i, (name, street, zip_code, x, y) in enumerate(places):
+                # Lower triangle, each row ends with the zero distance to itself
+                distances = [f"{math.hypot(x - x2, y - y2):.4f}" for _, _, _, x2, y2 in places[:i]]
+                writer.writerow([f"{name}\n {street}", f" {street}\n({zip_code})"] + distances + ["0"])
+
+        # The same places as coordinates, for CoordinateDistances
+        coordinateFile = os.path.join(directory, "coordinates.csv")
+        with open(coordinateFile, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["Name", "Address", "Zip", "X", "Y"])
+            for name, street, zip_code, x, y in places:
+                writer.writerow([name, street, zip_code, f"{x:.6f}", f"{y:.6f}"])
+
+        packageFile = os.path.join(directory, "packages.csv")
+        with open(packageFile, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["PackageID", "Address", "City", "State", "Zip", "DeliveryDeadline", "WeightKILO", "SpecialNotes"])
+            for row in self._generatePackages(rng, places):
+                writer.writerow(row)
+
+        scenario = {
+            "distances": distanceFile,
+            "coordinates": coordinateFile,
+            "packages": packageFile,
+            "addresses": self.addresses,
+            "package_count": self.packages,
+            "trucks": self.trucks,
+            "seed": self.seed,
+        }
+        with open(os.path.join(directory, "scenario.json"), "w") as file:
+            json.dump(scenario, file, indent=2)
+        return scenario
+
+    def _generatePlaces(self, rng):
+        """
+        Generate the addresses, the HUB first.
+
+        Args:
+            rng: random.Random to draw from.
+
+        Returns:
+            A list of (name, street address, zip code, x, y) tuples.
+        """
+        places = [("Western Governors University", AddressImporter.HUB_ADDRESS, 84107, self.area / 2, self.area / 2)]
+        for i in range(1, self.addresses):
+            # House numbers are unique, so every street address is distinct
+            street = f"{i * 10} {self.STREETS[i % len(self.STREETS)]}"
+            places.append((f"Stop {i}", street, 84100 + i % 100, rng.uniform(0, self.area), rng.uniform(0, self.area)))
+        return places
+
+    def _generatePackages(self, rng, places):
+        """
+        Generate the package rows.
+
+        Each package gets at most one special note. Group members never get another note,
+        so every group can be loaded onto any truck at any time.
+
+        Args:
+            rng: random.Random to draw from.
+            places: Addresses from _generatePlaces.
+
+        Returns:
+            A list of CSV rows.
+        """
+        pkgIDs = list(range(1, self.packages + 1))
+        shuffled = pkgIDs[:]
+        rng.shuffle(shuffled)
+
+        # Split a shuffled copy of the IDs by note, so the shares are exact
+        groupCount = int(self.packages * self.group_share)
+        delayedCount = int(self.packages * self.delayed_share)
+        truckOnlyCount = int(self.packages * self.truck_only_share)
+        grouped = shuffled[:groupCount]
+        delayed = set(shuffled[groupCount:groupCount + delayedCount])
+        truckOnly = set(shuffled[groupCount + delayedCount:groupCount + delayedCount + truckOnlyCount])
+
+        notes = {}
+        while len(grouped) >= 2:
+            size = min(rng.randint(2, self.max_group_size), len(grouped))
+            group, grouped = sorted(grouped[:size]), grouped[size:]
+            notes[group[0]] = "Must be delivered with " + ", ".join(str(pkgID) for pkgID in group[1:])
+        for pkgID in delayed:
+            notes[pkgID] = f"Delayed on flight---will not arrive to depot until {self._formatTime(self.DELAY_TIME)}"
+        for pkgID in truckOnly:
+            notes[pkgID] = f"Can only be on truck {rng.randint(1, self.trucks)}"
+
+        rows = []
+        for pkgID in pkgIDs:
+            _, street, zip_code, _, _ = places[rng.randrange(1, len(places))]
+            deadline = "EOD"
+            if rng.random() < self.deadline_share:
+                # Deadlines are stored as a fraction of a day
+                deadline = f"{rng.choice(self.DEADLINES) / timedelta(days=1):g}"
+            rows.append([pkgID, street, "Salt Lake City", "UT", zip_code, deadline, rng.randint(1, 88), notes.get(pkgID, "")])
+        return rows
+
+    def _formatTime(self, time):
+        """
+        Format a time the way the manifest's delay notes do, e.g. "9:05 am".
+
+        Args:
+            time: The time as a timedelta.
+
+        Returns:
+            The formatted time.
+        """
+        hours, minutes = divmod(int(time.total_seconds()) // 60, 60)
+        return f"{(hours - 1) % 12 + 1}:{minutes:02} {'am' if hours < 12 else 'pm'}"
+
+# Generate a scenario from the command line
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Generate a synthetic WGUPS scenario.")
+    parser.add_argument("directory", help="Directory to write the scenario files into")
+    parser.add_argument("--addresses", type=int, default=27)
+    parser.add_argument("--packages", type=int, default=40)
+    parser.add_argument("--trucks", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    print(json.dumps(ScenarioGenerator(args.addresses, args.packages, args.trucks, args.seed).write(args.directory), indent=2))
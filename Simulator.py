@@ -0,0 +1,195 @@
+import heapq, warnings
+from datetime import timedelta
+from time import perf_counter
+from enum import Enum
+
+from Package import PackageState
+from Instrumentation import instrumentation
+
+class EventType(Enum):
+    """
+    Kinds of events in the delivery simulation.
+    """
+    DEPART = "Depart"   # Truck at the HUB loads packages and leaves
+    ARRIVE = "Arrive"   # Truck reaches a package's delivery address
+    DELIVER = "Deliver" # Truck hands over a package
+    RETURN = "Return"   # Truck gets back to the HUB
+    RELEASE = "Release" # Delayed packages arrive at the HUB, or a corrected address becomes known
+
+class Simulator:
+    """
+    A discrete-event simulation of the delivery day.
+
+    Events are kept in a heap ordered by time, so every truck runs on the same clock and
+    fleet-wide decisions (which truck loads a delayed package, for example) are made in
+    the order they happen. Events at the same time run in the order they were scheduled.
+    Trucks with nothing to load wait at the HUB until the next release event.
+    """
+
+    def __init__(self, router, trucks):
+        """
+        Initialize a Simulator with given attributes.
+
+        Args:
+            router: The Routing instance used to load packages onto trucks.
+            trucks: List of Truck objects available for deliveries.
+        """
+        self.router = router
+        self.addressImporter = router.addressImporter
+        self.pkgHashTable = router.pkgHashTable
+        self.trucks = trucks
+        self.events = [] # Heap of (time, sequence number, EventType, truck, data)
+        self.sequence = 0 # Breaks ties between events at the same time
+        self.locations = {truck.id: self.addressImporter.hub_index for truck in trucks} # Truck ID -> address index
+        self.waiting = [] # Trucks idle at the HUB until the next release
+        self.processed = 0 # Number of events handled
+        self.trips = {} # Truck ID -> (departure time, perf_counter() at departure) of its latest trip
+        self.nextStops = {} # Truck ID -> (arrival time, address index, package) of the stop it is driving to
+        self.time = None # Time of the simulation clock, the last event handled or the time run() stopped at
+        self.handlers = {
+            EventType.DEPART: self._depart,
+            EventType.ARRIVE: self._arrive,
+            EventType.DELIVER: self._deliver,
+            EventType.RETURN: self._return,
+            EventType.RELEASE: self._release,
+        }
+
+    def schedule(self, time, eventType, truck=None, data=None):
+        """
+        Add an event to the queue.
+
+        Args:
+            time: When the event happens.
+            eventType: The EventType of the event.
+            truck: The truck the event belongs to. Defaults to None.
+            data: Extra data for the event handler. Defaults to None.
+        """
+        heapq.heappush(self.events, (time, self.sequence, eventType, truck, data))
+        self.sequence += 1
+
+    def run(self, until=None):
+        """
+        Run the simulation until no events remain.
+
+        Args:
+            until: Stop before the first event after this time. Defaults to None (run to the end).
+
+        Returns:
+            The number of events handled.
+        """
+        if self.sequence == 0:
+            self._start()
+
+        events = self.events
+        handlers = self.handlers
+        with instrumentation.span("deliver"):
+            while events and ((until is None) or (events[0][0] <= until)):
+                time, _, eventType, truck, data = heapq.heappop(events)
+                self.time = time
+                handlers[eventType](time, truck, data)
+                self.processed += 1
+        if (until is not None) and ((self.time is None) or (until > self.time)):
+            self.time = until
+
+        if not events:
+            undelivered = len(self.pkgHashTable) - self.pkgHashTable.countByState(PackageState.DELIVERED)
+            if undelivered:
+                warnings.warn(f"{undelivered} packages could not be delivered by any truck")
+        return self.processed
+
+    def _start(self):
+        """
+        Schedule every address correction, the first departure of every truck and every package release.
+
+        Corrections come first, so an address known at a truck's departure time is used by that load.
+        """
+        for pkg in self.pkgHashTable:
+            if pkg.needsAddressCorrection():
+                self.schedule(pkg.correction_time, EventType.RELEASE, None, pkg)
+        for truck in self.trucks:
+            self.schedule(truck.current_time, EventType.DEPART, truck)
+        for releaseTime in sorted({releaseTime for releaseTime, _ in self.router.pkgUnits if releaseTime is not None}):
+            self.schedule(releaseTime, EventType.RELEASE)
+
+    def _depart(self, time, truck, data):
+        """
+        Load a truck waiting at the HUB and send it to its first stop.
+        """
+        truck.waitUntil(time)
+        # The first load of each truck is its start-of-day load, later ones are reloads
+        with instrumentation.span(truck.id in self.trips and "reload" or "load", truck=truck.id):
+            self.router.loadPackagesOntoTruck(truck)
+        if len(truck.packageIDs) == 0:
+            # Nothing to carry yet, wait for more packages to be released
+            self.waiting.append(truck)
+            return
+        self.trips[truck.id] = (time, perf_counter())
+
+        # Update status of all packages loaded on truck to "En route"
+        truck.updatePackagesStatus(self.pkgHashTable, PackageState.EN_ROUTE)
+        self._scheduleNextStop(truck)
+
+    def _arrive(self, time, truck, data):
+        """
+        Move a truck to the delivery address of a package.
+        """
+        pkg, distance, addressID, address = data
+        truck.driveTo(address, distance)
+        self.locations[truck.id] = addressID
+        del self.nextStops[truck.id]
+        if (pkg.id in truck.packageIDs) and (pkg.address_id == addressID):
+            self.schedule(time, EventType.DELIVER, truck, pkg)
+        else:
+            # The package was removed or sent elsewhere while the truck was on its way
+            self._scheduleNextStop(truck)
+
+    def _deliver(self, time, truck, pkg):
+        """
+        Deliver a package and send the truck on to its next stop.
+        """
+        truck.dropOffPackage(self.pkgHashTable, pkg.id)
+        self._scheduleNextStop(truck)
+
+    def _return(self, time, truck, distance):
+        """
+        Bring a truck back to the HUB and have it load again right away.
+        """
+        truck.returnToHub(distance)
+        self.locations[truck.id] = self.addressImporter.hub_index
+        if instrumentation.enabled:
+            # Each trip is one delivery round, its wall-clock time includes the other trucks' events meanwhile
+            departTime, start = self.trips[truck.id]
+            instrumentation.record("trip", start, perf_counter() - start, truck=truck.id,
+                                   depart=str(departTime), back=str(time))
+        self.schedule(time, EventType.DEPART, truck)
+
+    def _release(self, time, truck, data):
+        """
+        Apply an address correction, or wake every truck waiting at the HUB since new packages may be loadable.
+        """
+        if data is not None:
+            # Only packages still at the HUB, the corrected address was applied by a mid-day change otherwise
+            if data.needsAddressCorrection() and (data.current_state == PackageState.AT_HUB):
+                self.router.changeAddress(data, *data.corrected_address, time)
+            return
+        waiting, self.waiting = self.waiting, []
+        for waitingTruck in sorted(waiting, key=lambda truck: truck.id):
+            self.schedule(time, EventType.DEPART, waitingTruck)
+
+    def _scheduleNextStop(self, truck):
+        """
+        Schedule a truck's arrival at its next delivery, or its return to the HUB when empty.
+
+        Args:
+            truck: The truck to move on.
+        """
+        location = self.locations[truck.id]
+        if len(truck.packageIDs) > 0:
+            pkg = self.pkgHashTable.lookup(truck.packageIDs[0])
+            distance = self.addressImporter.distance_by_index(location, pkg.address_id)
+            arrival = truck.current_time + timedelta(hours=distance / truck.speed)
+            self.nextStops[truck.id] = (arrival, pkg.address_id, pkg)
+            self.schedule(arrival, EventType.ARRIVE, truck, (pkg, distance, pkg.address_id, pkg.address))
+        else:
+            distance = self.addressImporter.distance_by_index(location, self.addressImporter.hub_index)
+            self.schedule(truck.current_time + timedelta(hours=distance / truck.speed), EventType.RETURN, truck, distance)
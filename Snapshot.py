@@ -0,0 +1,245 @@
+import hashlib, json, os, sys
+from datetime import timedelta
+
+from Driver import Driver
+from Package import Package, PackageState, internAddress
+from PackageStore import PackageStore
+from Timeline import Timeline
+from Truck import Truck
+from Instrumentation import instrumentation
+
+class Snapshot:
+    """
+    A saved delivery plan, so the day can be reviewed without routing it again.
+
+    The snapshot is a JSON file holding every package's status and history, and every truck's
+    state and mileage log. It is keyed by a hash of the input files and the routing
+    configuration, and only used when the key and the format version both match. Times are
+    stored as whole microseconds, so they are restored exactly.
+    """
+    # Version of the snapshot layout, bump when the format changes
+    VERSION = 2
+
+    def __init__(self, file):
+        """
+        Initialize a Snapshot with given attributes.
+
+        Args:
+            file: Path of the snapshot file.
+        """
+        self.file = file
+
+    @staticmethod
+    def key(files, config):
+        """
+        Get the key of a plan.
+
+        Args:
+            files: Paths of the files the plan depends on.
+            config: JSON-serializable dict of routing settings, other values are converted with str().
+
+        Returns:
+            The hex SHA-256 digest of the files' contents and the settings.
+        """
+        digest = hashlib.sha256()
+        for path in files:
+            digest.update(path.encode())
+            with open(path, 'rb') as file:
+                for chunk in iter(lambda: file.read(1 << 20), b''):
+                    digest.update(chunk)
+        digest.update(json.dumps(config, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def load(self, key):
+        """
+        Restore a plan from the snapshot file.
+
+        Args:
+            key: Key of the wanted plan.
+
+        Returns:
+            A tuple of (PackageStore, list of trucks), or None if there is no valid snapshot for the key.
+        """
+        with instrumentation.span("snapshot", action="load"):
+            try:
+                with open(self.file, 'r') as file:
+                    data = json.load(file)
+                if (data["version"] != self.VERSION) or (data["key"] != key):
+                    return None
+                pkgHashTable = PackageStore(10)
+                pkgHashTable.insertMany([self._decodePackage(pkg) for pkg in data["packages"]])
+                trucks = [self._decodeTruck(truck) for truck in data["trucks"]]
+            except (OSError, ValueError, KeyError, IndexError, TypeError):
+                return None
+        return pkgHashTable, trucks
+
+    def save(self, key, pkgHashTable, trucks):
+        """
+        Write a plan to the snapshot file.
+
+        The file is written to a temporary path and renamed into place, so readers never see
+        a partial snapshot. Failures are ignored, the snapshot is only an optimization.
+
+        Args:
+            key: Key of the plan.
+            pkgHashTable: The PackageStore after delivery.
+            trucks: The trucks after delivery.
+
+        Returns:
+            True if the snapshot was written, False otherwise.
+        """
+        with instrumentation.span("snapshot", action="save"):
+            data = {
+                "version": self.VERSION,
+                "key": key,
+                "packages": [self._encodePackage(pkg) for pkg in sorted(pkgHashTable, key=lambda pkg: pkg.id)],
+                "trucks": [self._encodeTruck(truck) for truck in trucks],
+            }
+            try:
+                with open(f"{self.file}.tmp", 'w') as file:
+                    json.dump(data, file)
+                os.replace(f"{self.file}.tmp", self.file)
+            except OSError:
+                return False
+        return True
+
+    def _encodePackage(self, pkg):
+        """
+        Convert a package to JSON-serializable values.
+
+        Args:
+            pkg: The package.
+
+        Returns:
+            A dict of the package's fields.
+        """
+        return {
+            "id": pkg.id,
+            "address": [pkg.address, pkg.city, pkg.state, pkg.zip_code],
+            "address_id": pkg.address_id,
+            "deadline": _encodeTime(pkg.deadline),
+            "weight": pkg.weight,
+            "special_notes": pkg.special_notes,
+            "status": [[text, _encodeTime(time)] for text, time in pkg.status],
+            "state": pkg.current_state.value,
+            "truck_id": pkg.truck_id,
+            "load_time": _encodeTime(pkg.load_time),
+            "delivery_time": _encodeTime(pkg.delivery_time),
+            "available_at": _encodeTime(pkg.available_at),
+            "required_truck": pkg.required_truck,
+            "delivered_with": list(pkg.delivered_with),
+            "corrected_address": pkg.corrected_address and list(pkg.corrected_address),
+            "correction_time": _encodeTime(pkg.correction_time),
+            "address_history": [[_encodeTime(time), list(address)] for time, address in pkg.address_history],
+            "state_history": [[_encodeTime(time), state.value] for time, state in pkg.state_history],
+            "truck_history": [[_encodeTime(time), truckID] for time, truckID in pkg.truck_history],
+        }
+
+    def _decodePackage(self, data):
+        """
+        Rebuild a package from its encoded fields.
+
+        Args:
+            data: A dict from _encodePackage().
+
+        Returns:
+            The Package.
+        """
+        text, time = data["status"][0]
+        pkg = Package(data["id"], *data["address"], _decodeTime(data["deadline"]), data["weight"], data["special_notes"],
+                      text, _decodeTime(time), data["address_id"])
+        pkg.status = [(sys.intern(text), _decodeTime(time)) for text, time in data["status"]]
+        pkg.current_state = PackageState(data["state"])
+        pkg.truck_id = data["truck_id"]
+        pkg.load_time = _decodeTime(data["load_time"])
+        pkg.delivery_time = _decodeTime(data["delivery_time"])
+        pkg.available_at = _decodeTime(data["available_at"])
+        pkg.required_truck = data["required_truck"]
+        pkg.delivered_with = tuple(data["delivered_with"])
+        pkg.corrected_address = data["corrected_address"] and tuple(data["corrected_address"])
+        pkg.correction_time = _decodeTime(data["correction_time"])
+        pkg.address_history = _decodeTimeline(data["address_history"], lambda address: internAddress(*address))
+        pkg.state_history = _decodeTimeline(data["state_history"], PackageState)
+        pkg.truck_history = _decodeTimeline(data["truck_history"])
+        return pkg
+
+    def _encodeTruck(self, truck):
+        """
+        Convert a truck to JSON-serializable values.
+
+        Args:
+            truck: The truck.
+
+        Returns:
+            A dict of the truck's fields.
+        """
+        return {
+            "id": truck.id,
+            "driver": truck.driver and truck.driver.id,
+            "speed": truck.speed,
+            "capacity": truck.capacity,
+            "mileage": truck.mileage,
+            "current_time": _encodeTime(truck.current_time),
+            "current_location": truck.current_location,
+            "packageIDs": list(truck.packageIDs),
+            "mileage_log": [[_encodeTime(time), mileage] for time, mileage in truck.mileage_log],
+        }
+
+    def _decodeTruck(self, data):
+        """
+        Rebuild a truck, and its driver, from its encoded fields.
+
+        Args:
+            data: A dict from _encodeTruck().
+
+        Returns:
+            The Truck.
+        """
+        truck = Truck(data["id"], _decodeTime(data["current_time"]), data["speed"], data["capacity"])
+        truck.mileage = data["mileage"]
+        truck.current_location = data["current_location"]
+        truck.packageIDs = data["packageIDs"]
+        truck.mileage_log = _decodeTimeline(data["mileage_log"])
+        if data["driver"] is not None:
+            Driver(data["driver"], [truck])
+        return truck
+
+def _encodeTime(time):
+    """
+    Convert a time to whole microseconds.
+
+    Args:
+        time: A timedelta, or None.
+
+    Returns:
+        The number of microseconds, or None.
+    """
+    return None if time is None else time // timedelta(microseconds=1)
+
+def _decodeTime(microseconds):
+    """
+    Convert whole microseconds back to a time.
+
+    Args:
+        microseconds: The number of microseconds, or None.
+
+    Returns:
+        A timedelta, or None.
+    """
+    return None if microseconds is None else timedelta(microseconds=microseconds)
+
+def _decodeTimeline(entries, convert=None):
+    """
+    Rebuild a Timeline from encoded (time, value) entries.
+
+    Args:
+        entries: List of [microseconds, value] pairs in time order.
+        convert: Function applied to each value. Defaults to None (values kept as they are).
+
+    Returns:
+        The Timeline.
+    """
+    timeline = Timeline()
+    for time, value in entries:
+        timeline.record(_decodeTime(time), convert(value) if convert else value)
+    return timeline
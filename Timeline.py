@@ -0,0 +1,113 @@
+from bisect import bisect_left, bisect_right
+
+class Timeline:
+    """
+    A history of values over time, stored as sorted parallel lists of times and values.
+
+    Point-in-time lookups use binary search, so they take O(log n) time.
+    Several values may share a time, the one recorded last wins.
+    """
+    __slots__ = ("times", "values")
+
+    def __init__(self, time=None, value=None):
+        """
+        Initialize a Timeline, optionally with a first entry.
+
+        Args:
+            time: Time of the first entry. Defaults to None (empty timeline).
+            value: Value of the first entry. Defaults to None.
+        """
+        self.times = []
+        self.values = []
+        if time is not None:
+            self.record(time, value)
+
+    def __len__(self):
+        """
+        Get the number of entries in the timeline.
+
+        Returns:
+            The number of entries.
+        """
+        return len(self.times)
+
+    def __iter__(self):
+        """
+        Iterate over the entries in time order.
+
+        Returns:
+            An iterator of (time, value) tuples.
+        """
+        return zip(self.times, self.values)
+
+    def record(self, time, value):
+        """
+        Record a value taking effect at a time.
+
+        Entries usually arrive in time order and are appended, out of order
+        entries are inserted after any entries with the same time.
+
+        Args:
+            time: Time the value takes effect.
+            value: The value.
+        """
+        if (len(self.times) == 0) or (self.times[-1] <= time):
+            self.times.append(time)
+            self.values.append(value)
+        else:
+            index = bisect_right(self.times, time)
+            self.times.insert(index, time)
+            self.values.insert(index, value)
+
+    def at(self, time, default=None):
+        """
+        Get the value in effect at a time, including entries recorded at exactly that time.
+
+        Args:
+            time: The time to look up.
+            default: Value returned if the time is before the first entry. Defaults to None.
+
+        Returns:
+            The last value recorded at or before the time.
+        """
+        index = bisect_right(self.times, time)
+        return self.values[index - 1] if index else default
+
+    def before(self, time, default=None):
+        """
+        Get the value in effect just before a time, ignoring entries recorded at exactly that time.
+
+        Args:
+            time: The time to look up.
+            default: Value returned if the time is at or before the first entry. Defaults to None.
+
+        Returns:
+            The last value recorded strictly before the time.
+        """
+        index = bisect_left(self.times, time)
+        return self.values[index - 1] if index else default
+
+    def until(self, time):
+        """
+        Get the entries recorded strictly before a time.
+
+        Args:
+            time: The time to stop at.
+
+        Returns:
+            A list of (time, value) tuples in time order.
+        """
+        index = bisect_left(self.times, time)
+        return list(zip(self.times[:index], self.values[:index]))
+
+    def last(self, default=None):
+        """
+        Get the most recent value.
+
+        Args:
+            default: Value returned if the timeline is empty. Defaults to None.
+
+        Returns:
+            The value of the last entry.
+        """
+        return self.values[-1] if self.values else default
@@ -1,9 +1,14 @@
 from datetime import datetime, timedelta
 
+from Package import PackageState
+from Timeline import Timeline
+
 class Truck:
     """
     Represents a delivery truck in the package delivery system.
     """
+    __slots__ = ("id", "packageIDs", "mileage", "current_time", "mileage_log", "speed",
+                 "capacity", "current_location", "driver")
 
     def __init__(self, id, start_time, speed=18, capacity=16):
         """
@@ -19,7 +24,7 @@ class Truck:
         self.packageIDs = []
         self.mileage = 0
         self.current_time = start_time
-        self.mileage_log = [[self.mileage, self.current_time]]
+        self.mileage_log = Timeline(self.current_time, self.mileage) # Mileage over time
         self.speed = speed
         self.capacity = capacity
         self.current_location = "HUB"
@@ -40,7 +45,7 @@ class Truck:
                 f"  Mileage: {self.mileage:06.1f}, Current Time: {(datetime.min + self.current_time).strftime("%I:%M %p")}\n"+ \
                 f"  Location: {self.current_location}\n" + \
                 f"  Mileage Log{(until != timedelta(hours=24, minutes=00)) and f" until {(datetime.min + until).strftime("%I:%M %p")}" or ""}:\n" + \
-                '\n'.join([f"    {(x[1]) and (datetime.min + x[1]).strftime("%I:%M %p") or "??:??"}: {x[0]:06.1f} miles" for x in self.mileage_log if x[1] < until]) #+ "\n" + \
+                '\n'.join([f"    {(x[0]) and (datetime.min + x[0]).strftime("%I:%M %p") or "??:??"}: {x[1]:06.1f} miles" for x in self.mileage_log.until(until)]) #+ "\n" + \
                 #f"  Current Load:\n" + \
                 #(','.join([f"    {pkgID}" for pkgID in self.packageIDs]) or "    Empty")
     
@@ -69,22 +74,22 @@ class Truck:
         """
         if len(self.packageIDs) < self.capacity:
             package = pkgHashTable.lookup(packageID)
-            package.updateStatus(f"Loaded on truck #{self.id}", self.current_time)
+            package.transition(PackageState.LOADED, self.current_time, self.id)
             self.packageIDs.append(packageID)
             return True
         return False
 
     def updatePackagesStatus(self, pkgHashTable, status):
         """
-        Update the status of all packages on the truck.
+        Update the state of all packages on the truck.
 
         Args:
             pkgHashTable: The HashTable of packages
-            status: status update for all packages
+            status: PackageState to move all packages to
         """
         for pkgID in self.packageIDs:
             package = pkgHashTable.lookup(pkgID)
-            package.updateStatus(status, self.current_time)
+            package.transition(status, self.current_time)
     
     def deliverPackage(self, pkgHashTable, packageID, distance):
         """
@@ -96,14 +101,44 @@ class Truck:
             distance: The distance to the delivery location in miles.
         """
         package = pkgHashTable.lookup(packageID)
+        self.driveTo(package.address, distance)
+        self.dropOffPackage(pkgHashTable, packageID)
+
+    def driveTo(self, location, distance):
+        """
+        Drive the truck to a delivery location.
+
+        Args:
+            location: The address being driven to.
+            distance: The distance to the location in miles.
+        """
         travel_time = distance / self.speed
         self.current_time += timedelta(hours=travel_time)
         self.mileage += distance
-        #if [self.mileage, self.current_time] not in self.mileage_log:
-        self.mileage_log.append([self.mileage, self.current_time])
-        package.updateStatus("Delivered", self.current_time)
+        self.mileage_log.record(self.current_time, self.mileage)
+        self.current_location = location
+
+    def dropOffPackage(self, pkgHashTable, packageID):
+        """
+        Mark a package delivered at the truck's current location and unload it.
+
+        Args:
+            pkgHashTable: The HashTable of packages
+            packageID: The package ID to be delivered.
+        """
+        package = pkgHashTable.lookup(packageID)
+        package.transition(PackageState.DELIVERED, self.current_time)
         self.packageIDs.remove(packageID)
-        self.current_location = package.address
+
+    def waitUntil(self, time):
+        """
+        Wait at the truck's current location until the given time.
+
+        Args:
+            time: The time to wait until, earlier times are ignored.
+        """
+        if time > self.current_time:
+            self.current_time = time
 
     def returnToHub(self, distance_to_hub):
         """
@@ -115,10 +150,21 @@ class Truck:
         travel_time = distance_to_hub / self.speed
         self.current_time += timedelta(hours=travel_time)
         self.mileage += distance_to_hub
-        #if [self.mileage, self.current_time] not in self.mileage_log:
-        self.mileage_log.append([self.mileage, self.current_time])
+        self.mileage_log.record(self.current_time, self.mileage)
         self.current_location = "HUB"
 
+    def mileage_at(self, time):
+        """
+        Get the total miles driven by the truck at a given time.
+
+        Args:
+            time: The time to look up.
+
+        Returns:
+            The mileage at that time, 0 before the truck starts.
+        """
+        return self.mileage_log.at(time, 0)
+
     def getPackages(self, pkgHashTable):
         """
         Get a list of all Packages loaded on the truck.
@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+import argparse, sys
+
+from BatchReport import BatchReport
+from MultiStart import MultiStart
+from main import planDeliveries, MULTI_START_RUNS
+from Instrumentation import instrumentation
+
+def parseTime(timeStr):
+    """
+    Convert a time string to a timedelta object.
+
+    Args:
+        timeStr: Time as "HH:MM AM/PM" (as in the menu) or 24-hour "HH:MM".
+
+    Returns:
+        The time converted to a timedelta object.
+    """
+    for timeFormat in ("%I:%M %p", "%H:%M"):
+        try:
+            time = datetime.strptime(timeStr.strip(), timeFormat)
+            return timedelta(hours=time.hour, minutes=time.minute)
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError(f"Invalid time: {timeStr}")
+
+def parseMinutes(minutesStr):
+    """
+    Convert a number of minutes to an int.
+
+    Args:
+        minutesStr: Whole number of minutes, at least 1.
+
+    Returns:
+        The number of minutes.
+    """
+    try:
+        minutes = int(minutesStr)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid minutes: {minutesStr}")
+    if minutes <= 0:
+        raise argparse.ArgumentTypeError(f"Minutes must be positive: {minutesStr}")
+    return minutes
+
+def parseArgs(args=None):
+    """
+    Parse the command line arguments.
+
+    Args:
+        args: List of arguments. Defaults to None (sys.argv).
+
+    Returns:
+        The parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Write WGUPS package and truck status at many times without the menu.")
+    parser.add_argument("times", nargs="*", type=parseTime, help="Query times, \"HH:MM AM/PM\" or \"HH:MM\"")
+    parser.add_argument("--every", type=parseMinutes, metavar="MINUTES", help="Also query every MINUTES from --start to --end")
+    parser.add_argument("--start", type=parseTime, default=timedelta(hours=8, minutes=0), help="First time for --every (default 08:00)")
+    parser.add_argument("--end", type=parseTime, help="Last time for --every (default the last event of the day)")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="Output format (default from the output file extension, else csv)")
+    parser.add_argument("-o", "--output", help="Output file (default standard output)")
+    parser.add_argument("--instrument", metavar="FILE", help="Write call counts and phase timings to FILE as JSON")
+    parser.add_argument("--profile", action="store_true", help="Include a cProfile summary with --instrument")
+    parser.add_argument("--memory", action="store_true", help="Include tracemalloc statistics with --instrument")
+    parser.add_argument("--fresh", action="store_true", help="Plan again instead of loading the saved plan")
+    parser.add_argument("--runs", type=int, default=MULTI_START_RUNS, help=f"Multi-start runs (default {MULTI_START_RUNS})")
+    return parser.parse_args(args)
+
+# Headless batch mode, writes status rows instead of opening the menu
+if __name__ == "__main__":
+    args = parseArgs()
+    if args.instrument:
+        instrumentation.enable(args.instrument, args.profile, args.memory)
+    pkgHashTable, trucks, router = planDeliveries(args.runs, not args.fresh, sys.stderr)
+    report = BatchReport(pkgHashTable, trucks)
+
+    times = list(args.times)
+    if args.every is not None:
+        end = args.end or report.lastEventTime() or args.start
+        times += BatchReport.timesEvery(args.start, end, timedelta(minutes=args.every))
+    if not times:
+        sys.exit("No query times given, pass times and/or --every MINUTES")
+
+    format = args.format or ((args.output or "").endswith(".jsonl") and "jsonl" or "csv")
+    if args.output:
+        with open(args.output, "w", newline="") as file:
+            count = report.write(times, file, format)
+    else:
+        count = report.write(times, sys.stdout, format)
+    print(f"Wrote {count} rows for {len(times)} query times", file=sys.stderr)
+    # The plan is kept as is, late packages are reported for the caller to act on
+    late, miles = MultiStart.score(pkgHashTable, trucks)
+    print(f"{late} packages late or undelivered, {miles:.1f} miles", file=sys.stderr)
+    # Route improvement only ran if the plan wasn't loaded from the snapshot
+    if router and router.routeOptimizer:
+        routes, before, after = router.routeOptimizer.totals()
+        print(f"2-opt/Or-opt improved {routes} routes from {before:.1f} to {after:.1f} miles", file=sys.stderr)
@@ -0,0 +1,182 @@
+from datetime import timedelta
+import argparse, json, platform, sys, tempfile, time
+
+from AddressImporter import AddressImporter
+from CoordinateDistances import CoordinateDistances
+from PackageImporter import PackageImporter
+from PackageStore import PackageStore
+from Truck import Truck
+from Routing import Routing
+from RouteOptimizer import RouteOptimizer
+from Partitioner import Partitioner
+from ExactSequencer import ExactSequencer
+from RoutingStrategy import STRATEGIES
+from InfoUI import InfoUI
+from BatchReport import BatchReport
+from MultiStart import MultiStart
+from ScenarioGenerator import ScenarioGenerator
+
+# Scenario sizes as ADDRESSES:PACKAGES:TRUCKS
+DEFAULT_SIZES = "27:40:2,100:400:4,300:2000:10"
+# Phases timed for every scenario, in the order they run
+PHASES = ("import", "load", "deliver", "report", "batch_report")
+
+def runScenario(scenario, strategyName="nearest", coordinates=False, partition=False):
+    """
+    Plan and report one scenario, timing each phase.
+
+    Args:
+        scenario: Dict returned by ScenarioGenerator.write().
+        strategyName: Name of the RoutingStrategy in STRATEGIES. Defaults to "nearest".
+        coordinates: Compute distances from the scenario's coordinates instead of reading
+            the distance matrix. Defaults to False.
+        partition: Split packages into geographic clusters before loading. Defaults to False.
+
+    Returns:
+        A dict of phase name to seconds, plus the resulting miles and late package count.
+    """
+    timings = {}
+
+    # Import addresses and packages, without the distance cache so parsing is measured
+    start = time.perf_counter()
+    if coordinates:
+        addressImporter = CoordinateDistances(scenario["coordinates"])
+    else:
+        addressImporter = AddressImporter(scenario["distances"], cache=False)
+    pkgHashTable = PackageStore(10)
+    PackageImporter(scenario["packages"], addressImporter, stream=True).importInto(pkgHashTable)
+    timings["import"] = time.perf_counter() - start
+
+    # Build the router and give every truck its start-of-day load
+    start = time.perf_counter()
+    strategy = STRATEGIES[strategyName](addressImporter, pkgHashTable)
+    trucks = [Truck(id, timedelta(hours=8, minutes=0)) for id in range(1, scenario["trucks"] + 1)]
+    partitioner = partition and Partitioner(addressImporter, min(truck.capacity for truck in trucks)) or None
+    router = Routing(addressImporter, pkgHashTable, RouteOptimizer(addressImporter, pkgHashTable),
+                     ExactSequencer(addressImporter, pkgHashTable), strategy, partitioner)
+    for truck in trucks:
+        router.loadPackagesOntoTruck(truck)
+    timings["load"] = time.perf_counter() - start
+
+    # Deliver everything, reloading as trucks return
+    start = time.perf_counter()
+    router.deliverPackages(trucks)
+    timings["deliver"] = time.perf_counter() - start
+
+    # Timed package reports as the menu builds them, every hour of the day
+    queryTimes = [timedelta(hours=hour) for hour in range(8, 18)]
+    start = time.perf_counter()
+    ui = InfoUI(pkgHashTable, trucks)
+    for atTime in queryTimes:
+        ui._generate_package_report(atTime)
+    timings["report"] = time.perf_counter() - start
+
+    # Every 5 minutes in a single sweep
+    start = time.perf_counter()
+    report = BatchReport(pkgHashTable, trucks)
+    for _ in report.sweep(BatchReport.timesEvery(timedelta(hours=8), report.lastEventTime() or timedelta(hours=8))):
+        pass
+    timings["batch_report"] = time.perf_counter() - start
+
+    late, miles = MultiStart.score(pkgHashTable, trucks)
+    timings["miles"] = round(miles, 1)
+    timings["late"] = late
+    return timings
+
+def runBenchmarks(sizes, repeat=3, seed=0, strategyName="nearest", coordinates=False, partition=False):
+    """
+    Generate and time a scenario of each size.
+
+    Args:
+        sizes: List of (addresses, packages, trucks) tuples.
+        repeat: Runs per scenario, the fastest time of each phase is kept. Defaults to 3.
+        seed: Scenario seed. Defaults to 0.
+        strategyName: Name of the RoutingStrategy in STRATEGIES. Defaults to "nearest".
+        coordinates: Use CoordinateDistances instead of the distance matrix. Defaults to False.
+        partition: Split packages into geographic clusters before loading. Defaults to False.
+
+    Returns:
+        A dict of results, keyed by size as "ADDRESSES:PACKAGES:TRUCKS".
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for addresses, packages, trucks in sizes:
+            key = f"{addresses}:{packages}:{trucks}"
+            scenario = ScenarioGenerator(addresses, packages, trucks, seed).write(f"{directory}/{key.replace(':', '_')}")
+            runs = [runScenario(scenario, strategyName, coordinates, partition) for _ in range(repeat)]
+            results[key] = {phase: min(run[phase] for run in runs) for phase in PHASES}
+            results[key]["miles"] = runs[0]["miles"]
+            results[key]["late"] = runs[0]["late"]
+            print(f"{key:>16}: " + ", ".join(f"{phase} {results[key][phase]:.3f}s" for phase in PHASES) +
+                  f", {results[key]['miles']} miles, {results[key]['late']} late", file=sys.stderr)
+    return results
+
+def compare(results, baseline, threshold=1.25, floor=0.01):
+    """
+    Compare benchmark results with a saved baseline.
+
+    Args:
+        results: Results from runBenchmarks().
+        baseline: Results loaded from a baseline file.
+        threshold: Slowdown ratio counted as a regression. Defaults to 1.25.
+        floor: Phases faster than this many seconds in both runs are never regressions. Defaults to 0.01.
+
+    Returns:
+        A list of (size, phase, baseline seconds, new seconds) for every regression.
+    """
+    regressions = []
+    for key, phases in results.items():
+        for phase in PHASES:
+            old = baseline.get(key, {}).get(phase)
+            if old is None:
+                continue
+            new = phases[phase]
+            ratio = new / old if old else float("inf")
+            print(f"{key:>16} {phase:>12}: {old:8.3f}s -> {new:8.3f}s ({ratio:.2f}x)", file=sys.stderr)
+            if (ratio > threshold) and (max(old, new) > floor):
+                regressions.append((key, phase, old, new))
+    return regressions
+
+def parseSizes(sizes):
+    """
+    Parse scenario sizes from a string.
+
+    Args:
+        sizes: Comma separated ADDRESSES:PACKAGES:TRUCKS entries.
+
+    Returns:
+        A list of (addresses, packages, trucks) tuples.
+    """
+    return [tuple(int(value) for value in size.split(":")) for size in sizes.split(",")]
+
+# Time every phase over synthetic scenarios, and optionally save or compare a JSON baseline
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark WGUPS routing on synthetic scenarios.")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"Comma separated ADDRESSES:PACKAGES:TRUCKS (default {DEFAULT_SIZES})")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per scenario, the fastest is kept (default 3)")
+    parser.add_argument("--seed", type=int, default=0, help="Scenario seed (default 0)")
+    parser.add_argument("--strategy", default="nearest", choices=sorted(STRATEGIES), help="Routing strategy (default nearest)")
+    parser.add_argument("--coordinates", action="store_true", help="Compute distances from coordinates instead of the matrix")
+    parser.add_argument("--partition", action="store_true", help="Split packages into geographic clusters before loading")
+    parser.add_argument("--save", metavar="FILE", help="Save the results as a JSON baseline")
+    parser.add_argument("--compare", metavar="FILE", help="Compare with a JSON baseline, exit with 1 on regressions")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown ratio counted as a regression (default 1.25)")
+    args = parser.parse_args()
+
+    results = runBenchmarks(parseSizes(args.sizes), args.repeat, args.seed, args.strategy, args.coordinates, args.partition)
+    output = {"python": platform.python_version(), "strategy": args.strategy, "seed": args.seed,
+              "distances": args.coordinates and "coordinates" or "matrix", "partition": args.partition, "results": results}
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(output, file, indent=2)
+    else:
+        print(json.dumps(output, indent=2))
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline["results"], args.threshold)
+        for key, phase, old, new in regressions:
+            print(f"Regression: {key} {phase} {old:.3f}s -> {new:.3f}s", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
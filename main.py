@@ -2,16 +2,10 @@
 
 from datetime import datetime, timedelta
 
-from PackageImporter import PackageImporter
 from AddressImporter import AddressImporter
-
-from Driver import Driver
-from Truck import Truck
-
-from HashTable import HashTable
-from Package import Package
-
-from Routing import Routing
+from MultiStart import MultiStart
+from Snapshot import Snapshot
+from Instrumentation import instrumentation
 
 from InfoUI import InfoUI
 
@@ -20,42 +14,88 @@ NUM_TRUCKS = 3
 NUM_DRIVERS = 2
 NUM_MIN = min(NUM_TRUCKS, NUM_DRIVERS) # Since Drivers stay with their assigned Truck, extras are not used
 
-# Import addresses and distances from the csv file
-addressImporter = AddressImporter('distances.csv')
-
-# Import Packages from the csv file and insert them into the HashTable
-pkgImporter = PackageImporter('packages.csv')
-pkgHashTable = HashTable(10)
-
-for pkg in pkgImporter.getPackages():
-    pkgHashTable.insert(pkg)
-
-# Create Routing instance
-# This handles package dependencies and other special cases
-# Uses the NN sorting algorithm to deliver packages
-router = Routing(addressImporter, pkgHashTable)
-
-# Initialize Trucks and Drivers
-# Assume 08:00 AM is when trucks start their routes
-trucks = [Truck(id, timedelta(hours=8, minutes=0)) for id in range(1, NUM_MIN + 1)]
-drivers = [Driver(id, trucks) for id in range(1, NUM_MIN + 1)]
-
-# Get the earliest delayed arrival time
-delayedArrivalTime = timedelta(hours=24, minutes=0)
-
-for pkg in pkgHashTable:
-    pkgArrivalTime = pkg.getArrivalTime()
-    if pkgArrivalTime and (delayedArrivalTime > pkgArrivalTime):
-        delayedArrivalTime = pkgArrivalTime
-
-# Load packages onto trucks, initial start-of-day load
-for truck in trucks:
-    router.loadPackagesOntoTruck(truck)
-
-# Deliver packages
-# This will load more packages onto the trucks as needed
-router.deliverPackages(trucks)
-
-# Creates InfoUI instance and starts the UI menu loop
-ui = InfoUI(pkgHashTable, trucks)
-ui.mainMenuLoop()
+# Algorithm used to load and order packages: "nearest", "cheapest", "regret" or "savings"
+ROUTING_STRATEGY = "nearest"
+
+# Split packages into one geographic cluster per truckload before loading, instead of loading greedily
+CLUSTER_FIRST = True
+
+# Randomized constructions tried in parallel, the best plan is kept (1 or less only runs the deterministic one)
+MULTI_START_RUNS = 16
+MULTI_START_TIME_LIMIT = 10.0 # Wall-clock seconds to wait for the parallel runs
+
+# Saved plan reused while the data files, settings and source files are unchanged, None always plans again
+SNAPSHOT_FILE = "plan.snapshot.json"
+# Data and source files the plan is built from, a change to any of them plans again
+PLAN_FILES = ['distances.csv', 'packages.csv', 'main.py', 'AddressImporter.py', 'DisjointSet.py', 'Driver.py',
+              'ExactSequencer.py', 'HashTable.py', 'MultiStart.py', 'Package.py', 'PackageImporter.py', 'PackageStore.py',
+              'Partitioner.py', 'RouteOptimizer.py', 'Routing.py', 'RoutingStrategy.py', 'Simulator.py', 'Snapshot.py',
+              'Timeline.py', 'Truck.py']
+
+# Write hot-path call counts and phase timings to this JSON file at exit, None turns instrumentation off
+INSTRUMENTATION_FILE = None
+INSTRUMENTATION_PROFILE = False # Also include a cProfile summary
+INSTRUMENTATION_MEMORY = False # Also include tracemalloc statistics
+
+# Corrected addresses for packages listed with a wrong address, and when they become known
+ADDRESS_CORRECTIONS = {
+    9: (timedelta(hours=10, minutes=20), ("410 S State St", "Salt Lake City", "UT", 84111)),
+}
+
+def planDeliveries(runs=MULTI_START_RUNS, snapshot=True, report=None):
+    """
+    Import the data files and plan the day's deliveries, or load the saved plan.
+
+    Args:
+        runs: Randomized constructions tried in parallel, 1 or less only runs the deterministic one.
+        snapshot: Load the plan from SNAPSHOT_FILE if it matches, and save it there otherwise. Defaults to True.
+        report: File to write the package import statistics to when planning. Defaults to None (not written).
+
+    Returns:
+        A tuple of (PackageStore, list of trucks, Routing) after delivery. Routing is None
+        when the plan was loaded from the snapshot.
+    """
+    # Source files are part of the key, so a changed algorithm never reuses an old plan
+    planSnapshot = snapshot and SNAPSHOT_FILE and Snapshot(SNAPSHOT_FILE) or None
+    if planSnapshot:
+        config = {"trucks": NUM_MIN, "strategy": ROUTING_STRATEGY, "cluster_first": CLUSTER_FIRST, "runs": runs,
+                  "time_limit": MULTI_START_TIME_LIMIT, "corrections": ADDRESS_CORRECTIONS}
+        key = Snapshot.key(PLAN_FILES, config)
+        restored = planSnapshot.load(key)
+        if restored:
+            return (*restored, None)
+
+    # Import addresses and distances from the csv file
+    with instrumentation.span("import"):
+        addressImporter = AddressImporter('distances.csv')
+
+    # Plans the day from the package csv file
+    # Assume 08:00 AM is when trucks start their routes
+    multiStart = MultiStart(addressImporter, 'packages.csv', ADDRESS_CORRECTIONS, NUM_MIN,
+                            timedelta(hours=8, minutes=0), ROUTING_STRATEGY, CLUSTER_FIRST)
+
+    # Find the seed of the best randomized plan, None keeps the deterministic plan
+    seed = None
+    if runs > 1:
+        seed, _ = multiStart.run(runs, time_limit=MULTI_START_TIME_LIMIT)
+
+    # Load and deliver packages with the chosen seed
+    pkgHashTable, trucks, router = multiStart.simulate(seed)
+    if report:
+        stats = multiStart.importStats
+        print(f"Imported {stats['imported']} of {stats['rows']} package rows ({stats['malformed']} malformed) "
+              f"at {stats['rows_per_second']:.0f} rows/s", file=report)
+    if planSnapshot:
+        planSnapshot.save(key, pkgHashTable, trucks)
+    return pkgHashTable, trucks, router
+
+# Worker processes may import this module, so only run the program when started directly
+if __name__ == "__main__":
+    if INSTRUMENTATION_FILE:
+        instrumentation.enable(INSTRUMENTATION_FILE, INSTRUMENTATION_PROFILE, INSTRUMENTATION_MEMORY)
+
+    pkgHashTable, trucks, router = planDeliveries()
+
+    # Creates InfoUI instance and starts the UI menu loop
+    ui = InfoUI(pkgHashTable, trucks)
+    ui.mainMenuLoop()
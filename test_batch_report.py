@@ -0,0 +1,28 @@
+import contextlib, io, unittest
+from datetime import timedelta
+
+import batch
+
+from BatchReport import BatchReport
+
+class BatchReportTest(unittest.TestCase):
+    """
+    Checks the query times of --every and that a step that never advances is rejected.
+    """
+
+    def test_times_every(self):
+        start, end = timedelta(hours=8), timedelta(hours=8, minutes=12)
+        self.assertEqual(BatchReport.timesEvery(start, end, timedelta(minutes=5)),
+                         [start, start + timedelta(minutes=5), start + timedelta(minutes=10)])
+        for step in (timedelta(0), timedelta(minutes=-5)):
+            with self.subTest(step), self.assertRaises(ValueError):
+                BatchReport.timesEvery(start, end, step)
+
+    def test_every_positive(self):
+        self.assertEqual(batch.parseArgs(["--every", "5"]).every, 5)
+        for every in ("0", "-5", "five"):
+            with self.subTest(every), self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+                batch.parseArgs(["--every", every])
+
+if __name__ == "__main__":
+    unittest.main()
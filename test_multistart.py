@@ -0,0 +1,39 @@
+import multiprocessing, tempfile, time, unittest
+from datetime import timedelta
+
+import main
+
+from AddressImporter import AddressImporter
+from MultiStart import MultiStart
+from ScenarioGenerator import ScenarioGenerator
+
+class MultiStartTest(unittest.TestCase):
+    """
+    Checks that parallel multi-start finds the best start and keeps to its time limit.
+    """
+
+    def test_best_start(self):
+        multiStart = MultiStart(AddressImporter('distances.csv'), 'packages.csv', main.ADDRESS_CORRECTIONS, main.NUM_MIN,
+                                timedelta(hours=8, minutes=0), "nearest", True)
+        deterministic = MultiStart.score(*multiStart.simulate(None)[:2])
+        seed, score = multiStart.run(4, workers=2, time_limit=60.0)
+        self.assertLessEqual(score, deterministic)
+        # Replaying the best seed locally gives the same plan
+        pkgHashTable, trucks, _ = multiStart.simulate(seed)
+        self.assertEqual(score, MultiStart.score(pkgHashTable, trucks))
+        self.assertEqual(multiprocessing.active_children(), [])
+
+    def test_time_limit(self):
+        # Regret insertion over 2000 packages takes far longer than the limit
+        with tempfile.TemporaryDirectory() as directory:
+            scenario = ScenarioGenerator(300, 2000, 10).write(directory)
+            multiStart = MultiStart(AddressImporter(scenario["distances"], cache=False), scenario["packages"], None,
+                                    scenario["trucks"], timedelta(hours=8, minutes=0), "regret")
+            start = time.monotonic()
+            self.assertEqual(multiStart.run(4, workers=2, time_limit=0.5), (None, None))
+            self.assertLess(time.monotonic() - start, 5.0)
+            # The workers were terminated rather than left running
+            self.assertEqual(multiprocessing.active_children(), [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import os, tempfile, unittest, warnings
+
+from AddressImporter import AddressImporter
+from PackageImporter import PackageImporter
+from PackageStore import PackageStore
+
+class PackageImporterTest(unittest.TestCase):
+    """
+    Checks that a streaming import skips malformed rows and reports them by line number.
+    """
+    ROWS = [
+        "PackageID,Address,City,State,Zip,DeliveryDeadline,WeightKILO,SpecialNotes",
+        "1,195 W Oakland Ave,Salt Lake City,UT,84115,0.4375,21,",
+        "2,999 Nowhere Rd,Salt Lake City,UT,84115,EOD,44,",
+        "3,233 Canyon Rd,Salt Lake City,UT,84103,EOD,2,Can only be on truck 2",
+        "x,233 Canyon Rd,Salt Lake City,UT,84103,EOD,2,",
+        "5,410 S State St,Salt Lake City",
+        "6,380 W 2880 S,Salt Lake City,UT,84115,EOD,heavy,",
+        "7,410 S State St,Salt Lake City,UT,84111,EOD,1,",
+    ]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file = os.path.join(self.directory.name, "packages.csv")
+        with open(self.file, "w") as file:
+            file.write("\n".join(self.ROWS) + "\n")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_malformed_rows_skipped(self):
+        importer = PackageImporter(self.file, AddressImporter('distances.csv'), stream=True)
+        store = PackageStore(10)
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter("always")
+            self.assertEqual(importer.importInto(store, chunk_size=2), 3)
+
+        self.assertEqual(sorted(pkg.id for pkg in store), [1, 3, 7])
+        self.assertEqual(store.lookup(3).required_truck, 2)
+        # Line numbers count the header, the unknown address is reported like any other bad value
+        self.assertEqual([lineNum for lineNum, _ in importer.malformed_rows], [3, 5, 6, 7])
+        self.assertIn("999 Nowhere Rd", importer.malformed_rows[0][1])
+        self.assertEqual(len(caught), 4)
+        self.assertEqual((importer.stats["rows"], importer.stats["imported"], importer.stats["malformed"]), (7, 3, 4))
+        self.assertGreater(importer.stats["rows_per_second"], 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,31 @@
+import unittest, warnings
+
+from AddressImporter import AddressImporter
+from PackageImporter import PackageImporter
+from PackageStore import PackageStore
+from Partitioner import Partitioner
+
+class PartitionerTest(unittest.TestCase):
+    """
+    Checks that clusters respect the capacity and required trucks without starting needless clusters.
+    """
+
+    def test_overflow_shares_cluster(self):
+        addressImporter = AddressImporter('distances.csv')
+        pkgHashTable = PackageStore(40)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            PackageImporter('packages.csv', addressImporter, stream=True).importInto(pkgHashTable)
+        # Four packages for truck 1 and one each for trucks 2 and 3, in clusters of 2
+        packages = [pkgHashTable.lookup(id) for id in (1, 2, 4, 5, 7, 8)]
+        for pkg, truck in zip(packages, (1, 1, 1, 1, 2, 3)):
+            pkg.required_truck = truck
+        clusters = Partitioner(addressImporter, 2).partition([(pkg,) for pkg in packages])
+
+        # Only one medoid is left for truck 1, the two packages that don't fit it share a new cluster
+        self.assertEqual(sorted((cluster.truck, len(cluster)) for cluster in clusters), [(1, 2), (1, 2), (2, 1), (3, 1)])
+        for cluster in clusters:
+            self.assertTrue(all(pkg.required_truck == cluster.truck for pkg in cluster.packages))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import tempfile, unittest, warnings
+from datetime import timedelta
+
+import main
+
+from AddressImporter import AddressImporter
+from PackageImporter import PackageImporter
+from PackageStore import PackageStore
+from Truck import Truck
+from Routing import Routing
+from MultiStart import MultiStart
+from RoutingStrategy import STRATEGIES, SavingsStrategy
+from ScenarioGenerator import ScenarioGenerator
+
+class RoutingConstraintTest(unittest.TestCase):
+    """
+    Checks the loading constraints and deadlines of every strategy, with and without clustering.
+    """
+    # Scenarios as (addresses, packages, trucks, seed), these used to split co-delivery groups
+    SCENARIOS = ((60, 200, 3, 0), (100, 400, 4, 2))
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.plans = []
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            for addresses, packages, trucks, seed in cls.SCENARIOS:
+                scenario = ScenarioGenerator(addresses, packages, trucks, seed).write(f"{cls.directory.name}/{addresses}_{seed}")
+                addressImporter = AddressImporter(scenario["distances"], cache=False)
+                for strategyName in sorted(STRATEGIES):
+                    for partition in (False, True):
+                        multiStart = MultiStart(addressImporter, scenario["packages"], None, trucks,
+                                                timedelta(hours=8, minutes=0), strategyName, partition)
+                        label = f"{addresses}:{packages}:{trucks} seed {seed}, {strategyName}, partition={partition}"
+                        cls.plans.append((label, *multiStart.simulate()))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_groups_loaded_together(self):
+        for label, pkgHashTable, trucks, router in self.plans:
+            with self.subTest(label):
+                router.checkGroups()
+                for group in router.pkgGroups.values():
+                    self.assertEqual(len({(pkg.truck_id, pkg.load_time) for pkg in group}), 1)
+
+    def test_required_trucks(self):
+        for label, pkgHashTable, trucks, router in self.plans:
+            with self.subTest(label):
+                for pkg in pkgHashTable:
+                    self.assertTrue(pkg.isDelivered())
+                    if pkg.required_truck is not None:
+                        self.assertEqual(pkg.truck_id, pkg.required_truck)
+
+    def test_shipped_deadlines(self):
+        addressImporter = AddressImporter('distances.csv')
+        for strategyName in sorted(STRATEGIES):
+            for partition in (False, True):
+                with self.subTest(f"{strategyName}, partition={partition}"), warnings.catch_warnings():
+                    warnings.simplefilter("ignore")
+                    multiStart = MultiStart(addressImporter, 'packages.csv', main.ADDRESS_CORRECTIONS, main.NUM_MIN,
+                                            timedelta(hours=8, minutes=0), strategyName, partition)
+                    pkgHashTable, trucks, router = multiStart.simulate()
+                    self.assertEqual(MultiStart.score(pkgHashTable, trucks)[0], 0)
+                    for pkg in pkgHashTable:
+                        if pkg.available_at is not None:
+                            self.assertGreaterEqual(pkg.load_time, pkg.available_at)
+
+    def test_savings_starts_farthest(self):
+        addressImporter = AddressImporter('distances.csv')
+        pkgHashTable = PackageStore(40)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            PackageImporter('packages.csv', addressImporter, stream=True).importInto(pkgHashTable)
+        loadablePkgs = {}
+        for pkg in pkgHashTable:
+            SavingsStrategy.addPackageByAddress(loadablePkgs, pkg)
+        pkg, position = SavingsStrategy(addressImporter, pkgHashTable).selectPackage(Truck(1, timedelta(hours=8, minutes=0)), loadablePkgs)
+        # Deadline packages go first, the farthest of them from the HUB is package 13
+        farthest = max((pkg for pkg in pkgHashTable if pkg.deadline is not None),
+                       key=lambda pkg: addressImporter.distance_by_index(addressImporter.hub_index, pkg.address_id))
+        self.assertEqual((pkg.id, position), (farthest.id, None))
+        self.assertEqual(pkg.id, 13)
+
+    def test_group_bigger_than_truck(self):
+        scenario = ScenarioGenerator(10, 8, 1, delayed_share=0, truck_only_share=0, group_share=1.0).write(f"{self.directory.name}/groups")
+        addressImporter = AddressImporter(scenario["distances"], cache=False)
+        pkgHashTable = PackageStore(10)
+        PackageImporter(scenario["packages"], addressImporter, stream=True).importInto(pkgHashTable)
+        router = Routing(addressImporter, pkgHashTable)
+        with self.assertRaises(ValueError):
+            router.loadPackagesOntoTruck(Truck(1, timedelta(hours=8, minutes=0), capacity=1))
+
+if __name__ == "__main__":
+    unittest.main()
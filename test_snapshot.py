@@ -0,0 +1,86 @@
+import json, os, tempfile, unittest, warnings
+from datetime import timedelta
+
+import main
+
+from AddressImporter import AddressImporter
+from MultiStart import MultiStart
+from Snapshot import Snapshot
+
+class SnapshotTest(unittest.TestCase):
+    """
+    Checks that a saved plan is restored exactly, and only for its own key and version.
+    """
+    # Package fields compared after a round trip, timelines are compared entry by entry
+    FIELDS = ("address", "city", "state", "zip_code", "address_id", "deadline", "weight", "special_notes", "status",
+              "current_state", "truck_id", "load_time", "delivery_time", "available_at", "required_truck",
+              "delivered_with", "corrected_address", "correction_time")
+    TIMELINES = ("address_history", "state_history", "truck_history")
+
+    @classmethod
+    def setUpClass(cls):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            multiStart = MultiStart(AddressImporter('distances.csv'), 'packages.csv', main.ADDRESS_CORRECTIONS, main.NUM_MIN,
+                                    timedelta(hours=8, minutes=0), main.ROUTING_STRATEGY, main.CLUSTER_FIRST)
+            cls.pkgHashTable, cls.trucks, _ = multiStart.simulate()
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.snapshot = Snapshot(os.path.join(self.directory.name, "plan.snapshot.json"))
+        self.key = Snapshot.key(['distances.csv', 'packages.csv'], {"strategy": main.ROUTING_STRATEGY})
+        self.assertTrue(self.snapshot.save(self.key, self.pkgHashTable, self.trucks))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        pkgHashTable, trucks = self.snapshot.load(self.key)
+        self.assertEqual(len(pkgHashTable), len(self.pkgHashTable))
+        for pkg in self.pkgHashTable:
+            restored = pkgHashTable.lookup(pkg.id)
+            for field in self.FIELDS:
+                self.assertEqual(getattr(restored, field), getattr(pkg, field), f"package {pkg.id} {field}")
+            for field in self.TIMELINES:
+                self.assertEqual(list(getattr(restored, field)), list(getattr(pkg, field)), f"package {pkg.id} {field}")
+
+        self.assertEqual(len(trucks), len(self.trucks))
+        for truck, restored in zip(self.trucks, trucks):
+            for field in ("id", "speed", "capacity", "mileage", "current_time", "current_location", "packageIDs"):
+                self.assertEqual(getattr(restored, field), getattr(truck, field), f"truck {truck.id} {field}")
+            self.assertEqual(list(restored.mileage_log), list(truck.mileage_log))
+            self.assertEqual(restored.driver.id, truck.driver.id)
+            self.assertEqual(str(restored), str(truck))
+
+    def test_other_key(self):
+        self.assertIsNone(self.snapshot.load(Snapshot.key(['distances.csv', 'packages.csv'], {"strategy": "regret"})))
+
+    def test_other_version(self):
+        with open(self.snapshot.file) as file:
+            data = json.load(file)
+        data["version"] = Snapshot.VERSION - 1
+        with open(self.snapshot.file, "w") as file:
+            json.dump(data, file)
+        self.assertIsNone(self.snapshot.load(self.key))
+
+    def test_damaged_file(self):
+        with open(self.snapshot.file, "r+") as file:
+            file.truncate(100)
+        self.assertIsNone(self.snapshot.load(self.key))
+        self.assertIsNone(Snapshot(os.path.join(self.directory.name, "missing.json")).load(self.key))
+
+    def test_empty_status(self):
+        with open(self.snapshot.file) as file:
+            data = json.load(file)
+        data["packages"][0]["status"] = []
+        with open(self.snapshot.file, "w") as file:
+            json.dump(data, file)
+        self.assertIsNone(self.snapshot.load(self.key))
+
+    def test_key_files_exist(self):
+        # Every file the plan is keyed on must exist, or the key would fail to hash it
+        for file in main.PLAN_FILES:
+            self.assertTrue(os.path.exists(file), file)
+
+if __name__ == "__main__":
+    unittest.main()